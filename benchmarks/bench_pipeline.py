@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Wall-clock and peak-memory benchmark for the load/aggregate pipeline.
+Linux only (peak memory is read from ``/proc/self/status``).
+
+Load modes, each run in a fresh interpreter so peak RSS is per mode:
+
+  completo     read the whole CSV, parse dates, aggregate once (no chunking)
+  bloques      read chunk by chunk and aggregate each chunk, no read-ahead
+               (what ``AnalisisVentas.cargar_datos`` does by default)
+  prefetch     same, with the next chunk read in a background thread
+               (``AnalisisVentas(..., lectura_anticipada=True)``)
+
+The output stages (PNG, JSON, text report) are timed sequentially and with
+``run_concurrently``.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --rows 3000000 --runs 3 --csv ventas.csv
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+MODES = ["completo", "bloques", "prefetch"]
+
+_LOAD_PROBE = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+import pandas as pd
+from utils.aggregation import ChunkAggregator
+from utils.pipeline import read_csv_chunks
+
+ruta, modo, chunksize = {ruta!r}, {modo!r}, {chunksize!r}
+
+def pico_kb():
+    # VmHWM restarts at exec; ru_maxrss would carry over the parent's peak
+    with open("/proc/self/status") as f:
+        return next(int(l.split()[1]) for l in f if l.startswith("VmHWM:"))
+
+base = pico_kb()
+inicio = time.perf_counter()
+agregados = ChunkAggregator()
+if modo == "completo":
+    df = pd.read_csv(ruta)
+    df["fecha"] = pd.to_datetime(df["fecha"], format="%Y-%m-%d")
+    agregados.add(df)
+else:
+    for bloque in read_csv_chunks(ruta, chunksize=chunksize, read_ahead=modo == "prefetch"):
+        bloque["fecha"] = pd.to_datetime(bloque["fecha"], format="%Y-%m-%d")
+        agregados.add(bloque)
+agregados.cubo()
+print(json.dumps({{"s": time.perf_counter() - inicio,
+                   "rss_mb": (pico_kb() - base) / 1024}}))
+"""
+
+
+def write_synthetic_csv(path: str, rows: int, seed: int = 0) -> None:
+    """Write ``rows`` sales lines with the ``AnalisisVentas`` schema."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    productos, clientes = 500, 5000
+    categorias = np.array([f"CATEGORIA {i}" for i in range(13)], dtype=object)
+    ciudades = np.array(["Cordoba", "Rio Cuarto", "Alta Gracia", "Carlos Paz", "Villa Maria", "Mendiolaza"], dtype=object)
+    pagos = np.array(["efectivo", "qr", "tarjeta", "transferencia"], dtype=object)
+    id_producto = rng.integers(1, productos + 1, rows)
+    id_cliente = rng.integers(1, clientes + 1, rows)
+    cantidad = rng.integers(1, 6, rows)
+    precio = rng.integers(200, 5000, productos + 1)
+    # January to June, the months the dashboard and report label
+    fechas = np.datetime64("2024-01-01") + rng.integers(0, 182, rows).astype("timedelta64[D]")
+    pd.DataFrame({
+        "id_venta": np.arange(1, rows + 1),
+        "fecha": fechas,
+        "id_cliente": id_cliente,
+        "nombre_cliente_final": np.char.add("Cliente ", id_cliente.astype(str)),
+        "ciudad": ciudades[id_cliente % len(ciudades)],
+        "id_producto": id_producto,
+        "nombre_producto": np.char.add("Producto ", id_producto.astype(str)),
+        "categoria_redefinida": categorias[id_producto % len(categorias)],
+        "cantidad": cantidad,
+        "importe": cantidad * precio[id_producto],
+        "medio_pago": pagos[rng.integers(0, len(pagos), rows)],
+    }).to_csv(path, index=False)
+
+
+def bench_load(ruta: str, modo: str, chunksize: int) -> dict:
+    codigo = _LOAD_PROBE.format(root=REPO_ROOT, ruta=ruta, modo=modo, chunksize=chunksize)
+    proc = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def bench_outputs(ruta: str, directorio: str) -> dict:
+    """Seconds for the three output stages, one after another and concurrently."""
+    import contextlib
+    import io
+
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    from main import AnalisisVentas
+    from utils.pipeline import run_concurrently
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        analisis = AnalisisVentas(ruta, directorio_salida=directorio, publicar_deltas=False)
+        analisis.procesar_datos()
+        tareas = {
+            "visualizaciones": analisis.generar_visualizaciones,
+            "json": analisis.exportar_datos_json,
+            "reporte": analisis.generar_reporte_texto,
+        }
+        tiempos = {}
+        for nombre, ejecutar in (
+            ("secuencial", lambda: [f() for f in tareas.values()]),
+            ("concurrente", lambda: run_concurrently(tareas, en_hilo_actual="visualizaciones")),
+        ):
+            # Fresh manifest each time so nothing is skipped as unchanged
+            for f in os.listdir(directorio):
+                os.unlink(os.path.join(directorio, f))
+            analisis.publicador.manifest = analisis.publicador._cargar_manifest()
+            inicio = time.perf_counter()
+            ejecutar()
+            tiempos[nombre] = time.perf_counter() - inicio
+    return tiempos
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carga por bloques y salidas concurrentes")
+    parser.add_argument("--csv", default=None, help="CSV a usar (por defecto se genera uno sintético)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Filas del CSV sintético")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Filas por bloque")
+    parser.add_argument("--runs", type=int, default=3, help="Repeticiones por modo")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        ruta = args.csv
+        if ruta is None:
+            ruta = os.path.join(tmp, "ventas.csv")
+            write_synthetic_csv(ruta, args.rows)
+        print(f"CSV: {ruta} ({os.path.getsize(ruta) / 1e6:.0f} MB), bloques de {args.chunksize:,} filas, "
+              f"{os.cpu_count()} CPU")
+
+        print(f"\n{'carga':<12} {'min s':>8} {'mediana s':>10} {'pico MB':>9}")
+        for modo in MODES:
+            muestras = [bench_load(ruta, modo, args.chunksize) for _ in range(args.runs)]
+            segundos = [m["s"] for m in muestras]
+            print(f"{modo:<12} {min(segundos):>8.2f} {statistics.median(segundos):>10.2f} "
+                  f"{max(m['rss_mb'] for m in muestras):>9.0f}")
+
+        salida = os.path.join(tmp, "salida")
+        os.makedirs(salida)
+        tiempos = bench_outputs(ruta, salida)
+        print(f"\n{'salidas':<12} {'s':>8}")
+        for nombre, segundos in tiempos.items():
+            print(f"{nombre:<12} {segundos:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the CLI entry points.
+
+Each module is imported in a fresh interpreter with ``python -X importtime`` and
+the cumulative import time reported for it is collected over several runs. The
+script also lists which heavy libraries ended up in ``sys.modules``, so a stray
+top-level ``import pandas`` shows up immediately.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --max-ms 150
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ENTRY_MODULES = ["main", "main2", "ejemplos_uso", "utils.data_utils"]
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib", "seaborn"]
+
+_PROBE = (
+    "import importlib, sys; importlib.import_module({module!r}); "
+    "print(','.join(m for m in {heavy!r} if m in sys.modules))"
+)
+
+
+def import_time_us(module: str) -> Optional[int]:
+    """Return the cumulative import time of ``module`` in microseconds, from a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    # Lines look like: "import time:       412 |      30518 | main"
+    for line in reversed(proc.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    return None
+
+
+def heavy_modules_loaded(module: str) -> List[str]:
+    """Return the heavy libraries that importing ``module`` pulls into ``sys.modules``."""
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    out = proc.stdout.strip()
+    return out.split(",") if out else []
+
+
+def run(modules: List[str], runs: int) -> Dict[str, dict]:
+    results = {}
+    for module in modules:
+        samples = [t for t in (import_time_us(module) for _ in range(runs)) if t is not None]
+        results[module] = {
+            "min_ms": min(samples) / 1000.0 if samples else None,
+            "median_ms": statistics.median(samples) / 1000.0 if samples else None,
+            "heavy": heavy_modules_loaded(module),
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo de arranque (import) por módulo")
+    parser.add_argument("modules", nargs="*", default=ENTRY_MODULES, help="Módulos a medir")
+    parser.add_argument("--runs", type=int, default=5, help="Repeticiones por módulo")
+    parser.add_argument("--max-ms", type=float, default=None, help="Falla si la mediana supera este valor")
+    args = parser.parse_args(argv)
+
+    results = run(args.modules, args.runs)
+    failed = False
+    print(f"{'module':<20} {'min ms':>10} {'median ms':>10}  heavy imports")
+    for module, r in results.items():
+        heavy = ", ".join(r["heavy"]) or "-"
+        if r["median_ms"] is None:
+            # -X importtime reported nothing for this module: no measurement, not a pass
+            print(f"{module:<20} {'n/a':>10} {'n/a':>10}  {heavy}")
+            failed = True
+            continue
+        print(f"{module:<20} {r['min_ms']:>10.1f} {r['median_ms']:>10.1f}  {heavy}")
+        if args.max_ms is not None and r["median_ms"] > args.max_ms:
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
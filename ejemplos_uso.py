@@ -1,26 +1,24 @@
 #!/usr/bin/env python3
 """
 Ejemplos de Uso - Dashboard Analytics (updated to use utils/data_utils)
-This file now uses utils.data_utils for safe CSV loading, numeric coercion and
-atomic JSON writes for the ejemplo_automatizacion example.
+ejemplo_automatizacion normalizes every CSV to one schema (utils/schema.py) so
+exports with renamed columns or other date formats are analyzed alike, and
+writes results atomically (utils/data_utils.py).
 """
 import logging
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-import seaborn as sns
-
-from utils.data_utils import ensure_columns, load_csv_safe, to_numeric_safe, write_json_atomic
+from utils.data_utils import write_json_atomic
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
 def ejemplo_basico():
     """Ejemplo básico de carga y análisis de datos"""
+    import pandas as pd
+
     logger.info("📊 EJEMPLO BÁSICO DE ANÁLISIS")
     # Minimal example - real implementation in original file
     datos_ejemplo = {
@@ -42,8 +40,23 @@ def ejemplo_basico():
 # ... (other example functions would remain, omitted here for brevity) ...
 
 
-def ejemplo_automatizacion(input_files: Optional[list] = None, output_json: str = "analisis_multiple.json"):
-    """Ejemplo de automatización de análisis sobre múltiples CSVs (hardened)."""
+def ejemplo_automatizacion(
+    input_files: Optional[Union[list, dict]] = None,
+    output_json: str = "analisis_multiple.json",
+    output_unificado: Optional[str] = None,
+    fuente: Optional[str] = None,
+):
+    """
+    Ejemplo de automatización de análisis sobre múltiples CSVs (hardened).
+
+    Con ``output_unificado`` además guarda todas las fuentes unificadas y sin
+    duplicados en un único CSV. Los duplicados se buscan solo entre archivos
+    de la misma fuente: ``input_files`` acepta ``"fuente=ruta"`` o un dict
+    ``{fuente: ruta o [rutas]}``, y ``fuente`` nombra a las rutas sueltas (por
+    defecto, cada archivo es su propia fuente).
+    """
+    from utils.schema import deduplicate, normalize_source, parse_sources
+
     logger.info("\n🤖 EJEMPLO DE AUTOMATIZACIÓN")
     logger.info("=" * 40)
 
@@ -51,33 +64,29 @@ def ejemplo_automatizacion(input_files: Optional[list] = None, output_json: str
         input_files = ["datos_enero.csv", "datos_febrero.csv", "datos_marzo.csv"]
 
     resultados = []
+    normalizados = []
 
-    def analizar_archivo(ruta_archivo: str):
+    def analizar_archivo(nombre_fuente: str, ruta_archivo: str):
         logger.info("Analizando archivo: %s", ruta_archivo)
         if not os.path.exists(ruta_archivo):
             logger.warning("Archivo no encontrado: %s - se omite.", ruta_archivo)
             return None
         try:
-            df = load_csv_safe(ruta_archivo, encoding="utf-8", low_memory=False)
-            # Optional: validate minimal expected columns if your workflow requires them
-            missing = ensure_columns(df, ["importe", "id_cliente"])
+            df = normalize_source(ruta_archivo, fuente=nombre_fuente)
+            mapeadas = set(df.attrs["mapeo"].values())
+            missing = [c for c in ("importe", "id_cliente") if c not in mapeadas]
             if missing:
                 logger.warning("Archivo %s no tiene columnas requeridas: %s - se continuará con valores parciales.", ruta_archivo, missing)
+            normalizados.append(df)
 
             registros = int(len(df))
-            columnas = list(df.columns)
-            total_ventas = None
-            clientes_unicos = None
-
-            if "importe" in df.columns:
-                df["importe"] = to_numeric_safe(df, "importe")
-                total_ventas = float(df["importe"].sum(skipna=True))
-
-            if "id_cliente" in df.columns:
-                clientes_unicos = int(df["id_cliente"].nunique())
+            columnas = df.attrs["columnas_origen"]
+            total_ventas = float(df["importe"].sum(skipna=True)) if "importe" in mapeadas else None
+            clientes_unicos = int(df["id_cliente"].nunique()) if "id_cliente" in mapeadas else None
 
             resumen = {
                 "archivo": ruta_archivo,
+                "fuente": nombre_fuente,
                 "fecha_analisis": datetime.utcnow().isoformat() + "Z",
                 "registros": registros,
                 "columnas": columnas,
@@ -90,8 +99,8 @@ def ejemplo_automatizacion(input_files: Optional[list] = None, output_json: str
             logger.exception("❌ Error analizando %s: %s", ruta_archivo, e)
             return None
 
-    for archivo in input_files:
-        r = analizar_archivo(archivo)
+    for nombre_fuente, archivo in parse_sources(input_files, fuente=fuente):
+        r = analizar_archivo(nombre_fuente, archivo)
         if r:
             resultados.append(r)
 
@@ -105,6 +114,12 @@ def ejemplo_automatizacion(input_files: Optional[list] = None, output_json: str
     else:
         logger.info("No se generaron resultados para guardar.")
 
+    if output_unificado and normalizados:
+        unificado = deduplicate(normalizados)
+        unificado.to_csv(output_unificado, index=False, date_format="%Y-%m-%d")
+        logger.info("✅ %d filas unificadas (%d duplicados descartados) en '%s'",
+                    len(unificado), unificado.attrs["duplicados"], output_unificado)
+
 
 if __name__ == "__main__":
     ejemplo_automatizacion()
\ No newline at end of file
@@ -10,40 +10,105 @@ Autor: Analytics Dashboard Team
 Fecha: 27/10/2024
 """
 
-import pandas as pd
-import numpy as np
-import json
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
+import io
 import warnings
 warnings.filterwarnings('ignore')
 
-# Configuración de estilo para las visualizaciones
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+# pandas, numpy, matplotlib y seaborn se importan de forma diferida dentro de
+# cada etapa: importar este módulo (o ejecutar un paso que no dibuja) no debe
+# pagar el coste de arranque de las librerías pesadas.
+_estilo_configurado = False
+
+
+def _configurar_estilo():
+    """Importa matplotlib/seaborn y aplica el estilo una sola vez por proceso"""
+    global _estilo_configurado
+    import matplotlib.pyplot as plt
+    if not _estilo_configurado:
+        import seaborn as sns
+        # Configuración de estilo para las visualizaciones
+        plt.style.use('seaborn-v0_8')
+        sns.set_palette("husl")
+        _estilo_configurado = True
+    return plt
 
 class AnalisisVentas:
     """Clase principal para análisis de datos de ventas"""
     
-    def __init__(self, ruta_archivo):
+    # Columnas esperadas en el CSV; todas son necesarias para agregar
+    COLUMNAS_ESPERADAS = ['fecha', 'id_cliente', 'nombre_cliente_final', 'ciudad', 
+                          'id_producto', 'nombre_producto', 'categoria_redefinida', 
+                          'cantidad', 'importe', 'medio_pago']
+    
+    def __init__(self, ruta_archivo, tamano_bloque=100_000, modo_dinero='float',
+                 directorio_salida='.', publicar_deltas=True, lectura_anticipada=False):
         """
         Inicializa el análisis con el archivo de datos
         
         Args:
             ruta_archivo (str): Ruta al archivo CSV de datos
+            tamano_bloque (int): Filas por bloque al leer el CSV
+            modo_dinero (str): 'float' (por defecto) o 'centavos' para sumar
+                importes exactos como enteros int64 de centavos
+            directorio_salida (str): Carpeta donde se publican PNG, JSON, reporte y manifest.json
+            publicar_deltas (bool): Escribir JSON Patch contra la exportación anterior
+            lectura_anticipada (bool): Leer el bloque siguiente en un hilo de fondo.
+                Desactivada por defecto: en benchmarks/bench_pipeline.py fue más
+                lenta y usó más memoria que la lectura por bloques simple
         """
+        from utils.publish import Publicador
+        
+        if modo_dinero not in ('float', 'centavos'):
+            raise ValueError(f"modo_dinero inválido: {modo_dinero!r} (use 'float' o 'centavos')")
         self.ruta_archivo = ruta_archivo
+        self.tamano_bloque = tamano_bloque
+        self.lectura_anticipada = lectura_anticipada
+        self.modo_dinero = modo_dinero
+        self.publicador = Publicador(directorio_salida, deltas=publicar_deltas)
         self.df = None
+        self.store = None
+        self.agregados = None
+        self._formato_fecha = None
+        self._importes_inconsistentes = 0
+        self._importes_invalidos = 0
+        self._importes_sin_verificar = 0
         self.datos_procesados = {}
         self.cargar_datos()
     
     def cargar_datos(self):
-        """Carga y valida los datos del archivo CSV"""
+        """Carga y valida los datos del archivo CSV o de un almacén binario (*.facts)"""
+        import pandas as pd
+
+        from utils.aggregation import ChunkAggregator
+        from utils.fact_store import is_fact_store, open_fact_store
+        from utils.pipeline import read_csv_chunks
+
         try:
             print("🔄 Cargando datos...")
-            self.df = pd.read_csv(self.ruta_archivo)
-            print(f"✅ Datos cargados exitosamente: {self.df.shape[0]} registros, {self.df.shape[1]} columnas")
+            if is_fact_store(self.ruta_archivo):
+                # Almacén mapeado en memoria: varios procesos comparten la caché de
+                # páginas. No se arma un DataFrame; las etapas usan las columnas
+                # mapeadas (self.frame() lo construye solo si se pide).
+                self.store = open_fact_store(self.ruta_archivo)
+                print(f"✅ Almacén de hechos abierto: {len(self.store)} registros (mapeado en memoria)")
+            else:
+                # Cada bloque se agrega apenas se lee; nunca se arma un DataFrame
+                # con todo el archivo.
+                self.agregados = ChunkAggregator()
+                bloques = read_csv_chunks(self.ruta_archivo, chunksize=self.tamano_bloque,
+                                          read_ahead=self.lectura_anticipada, dtype=self._dtype_lectura())
+                for bloque in bloques:
+                    bloque, invalidos = self._preparar_bloque(bloque)
+                    # Los importes inválidos se cuentan solo aquí, una vez por fila del archivo
+                    self._importes_invalidos += int(invalidos['importe'].sum()) if 'importe' in invalidos else 0
+                    self._agregar_bloque(bloque, invalidos)
+                if self.agregados.columnas is None:
+                    # Archivo sin filas: se registran al menos sus columnas
+                    bloque, invalidos = self._preparar_bloque(pd.read_csv(self.ruta_archivo, dtype=self._dtype_lectura()))
+                    self._agregar_bloque(bloque, invalidos)
+                print(f"✅ Datos cargados exitosamente: {self.agregados.filas} registros, "
+                      f"{len(self.agregados.columnas)} columnas")
             self.validar_datos()
         except FileNotFoundError:
             print(f"❌ Error: No se encontró el archivo {self.ruta_archivo}")
@@ -53,100 +118,274 @@ class AnalisisVentas:
             print(f"❌ Error al cargar datos: {e}")
             raise
     
+    def frame(self):
+        """DataFrame plano de los datos; se materializa solo al pedirlo"""
+        import pandas as pd
+
+        from utils.money import to_cents
+
+        if self.df is None and self.store is not None:
+            self.df = self.store.to_frame()
+            if self.modo_dinero == 'centavos':
+                self.df['importe'] = to_cents(self.df['importe'], errors='coerce')
+        elif self.df is None:
+            self.df, _ = self._preparar_bloque(pd.read_csv(self.ruta_archivo, dtype=self._dtype_lectura()))
+        return self.df
+    
+    def _dtype_lectura(self):
+        """En modo centavos los importes se leen como texto y se convierten a enteros sin pasar por float"""
+        from utils.money import read_money_columns_as_text
+
+        return read_money_columns_as_text() if self.modo_dinero == 'centavos' else None
+    
+    def _preparar_bloque(self, bloque):
+        """
+        Convierte las fechas (y en modo centavos, los importes) de un bloque recién leído
+        
+        Returns:
+            tuple: (bloque, {columna de dinero: máscara de valores vacíos o ilegibles})
+        """
+        import pandas as pd
+
+        from utils.money import MONEY_COLUMNS, parse_cents
+
+        if 'fecha' in bloque.columns:
+            if self._formato_fecha is None:
+                # Se decide una sola vez con el primer bloque: inferir el formato en
+                # cada bloque podría leer 01/02 como mes-día en uno y día-mes en otro
+                self._formato_fecha = _detectar_formato_fecha(bloque['fecha'])
+            bloque['fecha'] = pd.to_datetime(bloque['fecha'], format=self._formato_fecha)
+        invalidos = {}
+        if self.modo_dinero == 'centavos':
+            # Un importe vacío o ilegible no detiene la carga: suma 0 (como el NaN
+            # que se ignora en modo float) y se informa en la validación
+            for columna in MONEY_COLUMNS:
+                if columna in bloque.columns:
+                    bloque[columna], invalidos[columna] = parse_cents(bloque[columna])
+        return bloque, invalidos
+    
+    def _agregar_bloque(self, bloque, invalidos):
+        """Suma el bloque a los agregados parciales (y verifica sus importes en modo centavos)"""
+        import numpy as np
+
+        from utils.money import check_importe_consistency
+
+        if self.agregados.columnas is None:
+            # Se verifica con el primer bloque: sin estas columnas no se puede agregar
+            columnas_faltantes = set(self.COLUMNAS_ESPERADAS) - set(bloque.columns)
+            if columnas_faltantes:
+                print(f"⚠️  Columnas faltantes: {columnas_faltantes}")
+                raise KeyError(f"Columnas faltantes: {sorted(columnas_faltantes)}")
+        if self.modo_dinero == 'centavos' and 'precio_unitario' in bloque.columns:
+            # Las filas con algún valor vacío no se comparan; se informan aparte
+            incompletas = np.logical_or.reduce(list(invalidos.values()))
+            inconsistentes = check_importe_consistency(bloque, en_centavos=True, incompletas=incompletas)
+            self._importes_inconsistentes += len(inconsistentes)
+            self._importes_sin_verificar += inconsistentes.attrs['incompletas']
+        self.agregados.add(bloque)
+    
     def validar_datos(self):
         """Valida la estructura y calidad de los datos"""
         print("\n🔍 Validando estructura de datos...")
+        if self.store is not None:
+            self._validar_store()
+            return
         
-        # Columnas esperadas
-        columnas_esperadas = ['fecha', 'id_cliente', 'nombre_cliente_final', 'ciudad', 
-                             'id_producto', 'nombre_producto', 'categoria_redefinida', 
-                             'cantidad', 'importe', 'medio_pago']
-        
-        columnas_faltantes = set(columnas_esperadas) - set(self.df.columns)
-        if columnas_faltantes:
-            print(f"⚠️  Columnas faltantes: {columnas_faltantes}")
-        else:
-            print("✅ Estructura de columnas correcta")
+        # Las columnas faltantes ya detienen la carga con el primer bloque
+        agregados = self.agregados
+        print("✅ Estructura de columnas correcta")
         
         # Validar tipos de datos
-        print(f"📊 Tipos de datos:\n{self.df.dtypes}")
+        print(f"📊 Tipos de datos:\n{agregados.dtypes}")
         
-        # Verificar valores nulos
-        valores_nulos = self.df.isnull().sum()
+        # Verificar valores nulos (contados bloque a bloque)
+        valores_nulos = agregados.nulos
         if valores_nulos.sum() > 0:
             print(f"⚠️  Valores nulos encontrados:\n{valores_nulos[valores_nulos > 0]}")
         else:
             print("✅ No se encontraron valores nulos")
         
         # Estadísticas básicas
+        cubo = agregados.cubo()
         print(f"\n📈 Estadísticas básicas:")
-        print(f"- Período: {self.df['fecha'].min()} a {self.df['fecha'].max()}")
-        print(f"- Clientes únicos: {self.df['id_cliente'].nunique()}")
-        print(f"- Productos únicos: {self.df['id_producto'].nunique()}")
-        print(f"- Ciudades: {self.df['ciudad'].nunique()}")
-        print(f"- Categorías: {self.df['categoria_redefinida'].nunique()}")
+        print(f"- Período: {cubo['fecha'].min()} a {cubo['fecha'].max()}")
+        print(f"- Clientes únicos: {len(agregados.entidad('cliente'))}")
+        print(f"- Productos únicos: {len(agregados.entidad('producto'))}")
+        print(f"- Ciudades: {cubo['ciudad'].nunique()}")
+        print(f"- Categorías: {cubo['categoria_redefinida'].nunique()}")
+        
+        if self._importes_invalidos:
+            print(f"⚠️  {self._importes_invalidos} importes vacíos o ilegibles se suman como 0")
+        
+        # Consistencia de importes (solo si el archivo trae precio_unitario)
+        if self.modo_dinero == 'centavos' and 'precio_unitario' in agregados.columnas:
+            if self._importes_sin_verificar:
+                print(f"⚠️  {self._importes_sin_verificar} filas sin cantidad, precio_unitario o importe no se verificaron")
+            if self._importes_inconsistentes:
+                print(f"⚠️  {self._importes_inconsistentes} filas con cantidad * precio_unitario != importe")
+            else:
+                print("✅ Importes consistentes con cantidad * precio_unitario")
+    
+    def _validar_store(self):
+        """Validación equivalente sobre las columnas mapeadas del almacén"""
+        import numpy as np
+
+        from utils.dimensions import UNKNOWN_CODE
+        from utils.fact_store import MISSING
+
+        hechos = self.store.hechos
+        print("✅ Estructura de columnas correcta (almacén de hechos)")
+        print(f"📊 Tipos de datos:\n{hechos.dtype}")
+        
+        # En el almacén un nulo es un código desconocido, un importe NaN o el
+        # valor reservado MISSING en cantidad y fecha
+        valores_nulos = {campo: int(np.count_nonzero(hechos[campo] == UNKNOWN_CODE)) for campo in self.store.dims}
+        valores_nulos['importe'] = int(np.count_nonzero(np.isnan(hechos['importe'])))
+        valores_nulos['cantidad'] = int(np.count_nonzero(hechos['cantidad'] == MISSING[hechos.dtype['cantidad']]))
+        dias, dia = self.store.days()
+        valores_nulos['fecha'] = int(np.count_nonzero(dia < 0))
+        valores_nulos = {campo: n for campo, n in valores_nulos.items() if n}
+        if valores_nulos:
+            print(f"⚠️  Valores nulos encontrados: {valores_nulos}")
+        else:
+            print("✅ No se encontraron valores nulos")
+        if self.modo_dinero == 'centavos' and valores_nulos.get('importe'):
+            print(f"⚠️  {valores_nulos['importe']} importes vacíos se suman como 0")
+        
+        print(f"\n📈 Estadísticas básicas:")
+        if len(dias):
+            print(f"- Período: {dias[0]} a {dias[-1]}")
+        print(f"- Clientes únicos: {self.store.distinct('cliente')}")
+        print(f"- Productos únicos: {self.store.distinct('producto')}")
+        print(f"- Ciudades: {self.store.distinct('ciudad')}")
+        print(f"- Categorías: {self.store.distinct('categoria_redefinida')}")
     
     def procesar_datos(self):
         """Procesa los datos para generar insights"""
+        import numpy as np
+        import pandas as pd
+
+        from utils.anomalies import TOTAL, detect_anomalies, detect_anomalies_coded
+        from utils.dimensions import Dimension
+        from utils.money import CENTS, from_cents, to_cents
+
         print("\n🔄 Procesando datos...")
         
-        # Preparar datos temporales
-        self.df['fecha'] = pd.to_datetime(self.df['fecha'])
-        self.df['mes'] = self.df['fecha'].dt.month
-        self.df['dia_semana'] = self.df['fecha'].dt.day_name()
-        self.df['año_mes'] = self.df['fecha'].dt.to_period('M')
-        
-        # Calcular métricas principales
-        resumen = {
-            'total_ventas': float(self.df['importe'].sum()),
-            'total_cantidad': int(self.df['cantidad'].sum()),
-            'total_clientes': int(self.df['id_cliente'].nunique()),
-            'total_productos': int(self.df['id_producto'].nunique()),
-            'total_transacciones': len(self.df),
-            'promedio_venta': float(self.df['importe'].mean()),
-            'fecha_inicio': str(self.df['fecha'].min().date()),
-            'fecha_fin': str(self.df['fecha'].max().date())
-        }
+        # En modo centavos todas las sumas son enteras; se pasa a unidades al final
+        en_centavos = self.modo_dinero == 'centavos'
+        a_moneda = from_cents if en_centavos else float
+        
+        if self.store is not None:
+            # Todo se calcula sobre las columnas mapeadas, sin DataFrame por proceso
+            hechos = self.store.hechos
+            dims = self.store.dims
+            importe = to_cents(hechos['importe'], errors='coerce') if en_centavos else hechos['importe']
+            # Por dimensión: (códigos, importe, cantidad) de las filas a agregar
+            fuentes = {nombre: (hechos[nombre], importe, self.store.measure('cantidad')) for nombre in dims}
+            
+            # Serie temporal (un total por día con ventas)
+            ventas_temporal = self.store.daily(importe)
+            
+            # Los totales cubren también las filas sin fecha, que la serie diaria no incluye
+            con_importe = int((~np.isnan(hechos['importe'])).sum())
+            total = importe.sum() if en_centavos else np.nansum(importe)
+            resumen = {
+                'total_ventas': a_moneda(total),
+                'total_cantidad': int(np.nansum(self.store.measure('cantidad'))),
+                'total_clientes': self.store.distinct('cliente'),
+                'total_productos': self.store.distinct('producto'),
+                'total_transacciones': len(self.store),
+                'promedio_venta': float(total) / con_importe / (CENTS if en_centavos else 1) if con_importe else float('nan'),
+                'fecha_inicio': str(ventas_temporal['fecha'].min().date()),
+                'fecha_fin': str(ventas_temporal['fecha'].max().date())
+            }
+            
+            # Anomalías sobre los códigos ya almacenados
+            dias, dia = self.store.days()
+            series = {nombre: (hechos[nombre], dims[nombre].decode(np.arange(len(dims[nombre]))))
+                      for nombre in ('ciudad', 'categoria_redefinida', 'medio_pago')}
+            anomalias = detect_anomalies_coded(dia, dias, series, importe / (CENTS if en_centavos else 1))
+        else:
+            # Agregados parciales sumados bloque a bloque durante la carga: el cubo
+            # (día x categoría x ciudad x medio de pago) y los totales por producto/cliente
+            cubo = self.agregados.cubo()
+            productos = self.agregados.entidad('producto')
+            clientes = self.agregados.entidad('cliente')
+            
+            total = cubo['importe'].sum()
+            # En modo centavos los importes vacíos ya valen 0; no cuentan como venta con importe
+            con_importe = self.agregados.con_importe - self._importes_invalidos
+            resumen = {
+                'total_ventas': a_moneda(total),
+                'total_cantidad': int(cubo['cantidad'].sum()),
+                'total_clientes': len(clientes),
+                'total_productos': len(productos),
+                'total_transacciones': self.agregados.filas,
+                'promedio_venta': float(total) / con_importe / (CENTS if en_centavos else 1) if con_importe else float('nan'),
+                'fecha_inicio': str(cubo['fecha'].min().date()),
+                'fecha_fin': str(cubo['fecha'].max().date())
+            }
+            
+            # Dimensiones compactas: cada celda del cubo lleva solo códigos int32 y
+            # toda la agregación corre sobre esos códigos; los nombres se unen al final.
+            dims = {nombre: Dimension.from_values(cubo[nombre], nombre)
+                    for nombre in ('categoria_redefinida', 'ciudad', 'medio_pago')}
+            fuentes = {nombre: (dims[nombre].encode(cubo[nombre]), cubo['importe'].to_numpy(), cubo['cantidad'].to_numpy())
+                       for nombre in dims}
+            for nombre, tabla, etiqueta in (('producto', productos, 'nombre_producto'),
+                                            ('cliente', clientes, 'nombre_cliente_final')):
+                dims[nombre] = Dimension(nombre, tabla.index, tabla[[etiqueta]])
+                fuentes[nombre] = (np.arange(len(tabla)), tabla['importe'].to_numpy(), tabla['cantidad'].to_numpy())
+            
+            # Serie temporal
+            ventas_temporal = cubo.groupby('fecha')[['importe', 'cantidad']].sum().reset_index().sort_values('fecha')
+            
+            # Anomalías diarias: mediana/MAD móviles sobre todas las series
+            # (total, ciudad, categoría y medio de pago) a la vez; sumar las celdas
+            # del cubo da las mismas series diarias que sumar las filas
+            anomalias = detect_anomalies(
+                cubo, valores=cubo['importe'].to_numpy() / (CENTS if en_centavos else 1))
+        
+        def por_dimension(nombre):
+            codigos, importe, cantidad = fuentes[nombre]
+            totales = dims[nombre].aggregate(codigos, importe=importe, cantidad=cantidad)
+            totales.insert(0, nombre, dims[nombre].decode(range(len(dims[nombre]))))
+            return totales
+        
+        def top(nombre, etiqueta):
+            codigos, importe, cantidad = fuentes[nombre]
+            return dims[nombre].top_n(codigos, etiqueta, n=10, importe=importe, cantidad=cantidad)
         
         # Ventas por categoría
-        ventas_categoria = self.df.groupby('categoria_redefinida').agg({
-            'importe': 'sum',
-            'cantidad': 'sum'
-        }).reset_index().sort_values('importe', ascending=False)
+        ventas_categoria = por_dimension('categoria_redefinida').sort_values('importe', ascending=False)
         
         # Ventas por ciudad
-        ventas_ciudad = self.df.groupby('ciudad').agg({
-            'importe': 'sum',
-            'cantidad': 'sum'
-        }).reset_index().sort_values('importe', ascending=True)
+        ventas_ciudad = por_dimension('ciudad').sort_values('importe', ascending=True)
         
         # Métodos de pago
-        ventas_pago = self.df.groupby('medio_pago').agg({
-            'importe': 'sum',
-            'cantidad': 'sum'
-        }).reset_index()
-        
-        # Serie temporal
-        ventas_temporal = self.df.groupby('fecha').agg({
-            'importe': 'sum',
-            'cantidad': 'sum'
-        }).reset_index().sort_values('fecha')
-        
-        # Top productos
-        top_productos = self.df.groupby('nombre_producto').agg({
-            'importe': 'sum',
-            'cantidad': 'sum'
-        }).reset_index().sort_values('importe', ascending=False).head(10)
-        
-        # Top clientes
-        top_clientes = self.df.groupby('nombre_cliente_final').agg({
-            'importe': 'sum',
-            'cantidad': 'sum'
-        }).reset_index().sort_values('importe', ascending=False).head(10)
-        
-        # Análisis temporal detallado
-        ventas_mes = self.df.groupby('mes')['importe'].sum().sort_values(ascending=False)
-        ventas_dia_semana = self.df.groupby('dia_semana')['importe'].sum().sort_values(ascending=False)
+        ventas_pago = por_dimension('medio_pago')
+        
+        # Top productos (agregados por id_producto, nombre unido solo para el top 10)
+        top_productos = top('producto', 'nombre_producto')
+        
+        # Top clientes (agregados por id_cliente)
+        top_clientes = top('cliente', 'nombre_cliente_final')
+        
+        # Análisis temporal detallado, a partir de los totales diarios
+        por_dia = ventas_temporal.set_index('fecha')['importe']
+        ventas_mes = por_dia.groupby(por_dia.index.month).sum().sort_values(ascending=False)
+        ventas_dia_semana = por_dia.groupby(por_dia.index.day_name()).sum().sort_values(ascending=False)
+        
+        if en_centavos:
+            for tabla in (ventas_categoria, ventas_ciudad, ventas_pago, ventas_temporal):
+                tabla['importe'] = from_cents(tabla['importe'])
+            for registro in top_productos + top_clientes:
+                registro['importe'] = from_cents(registro['importe'])
+            ventas_mes = from_cents(ventas_mes)
+            ventas_dia_semana = from_cents(ventas_dia_semana)
+        
+        dias_anomalos = {a['fecha'] for a in anomalias if a['dimension'] == TOTAL}
+        ventas_temporal['anomalia'] = ventas_temporal['fecha'].dt.strftime('%Y-%m-%d').isin(dias_anomalos)
         
         # Guardar todos los datos procesados
         self.datos_procesados = {
@@ -155,10 +394,11 @@ class AnalisisVentas:
             'ventas_ciudad': ventas_ciudad.to_dict('records'),
             'ventas_pago': ventas_pago.to_dict('records'),
             'ventas_temporal': ventas_temporal.to_dict('records'),
-            'top_productos': top_productos.to_dict('records'),
-            'top_clientes': top_clientes.to_dict('records'),
+            'top_productos': top_productos,
+            'top_clientes': top_clientes,
             'ventas_mes': ventas_mes.to_dict(),
-            'ventas_dia_semana': ventas_dia_semana.to_dict()
+            'ventas_dia_semana': ventas_dia_semana.to_dict(),
+            'anomalias': anomalias
         }
         
         print("✅ Datos procesados exitosamente")
@@ -195,9 +435,19 @@ class AnalisisVentas:
         for pago in self.datos_procesados['ventas_pago']:
             porcentaje = (pago['importe'] / resumen['total_ventas']) * 100
             print(f"- {pago['medio_pago'].title()}: ${pago['importe']:,.2f} ({porcentaje:.1f}%)")
+        
+        # Anomalías
+        anomalias = self.datos_procesados.get('anomalias', [])
+        print(f"\n🚨 DÍAS ANÓMALOS DETECTADOS: {len(anomalias)}")
+        for anomalia in anomalias[:5]:
+            print(f"- {anomalia['fecha']} {anomalia['dimension']}={anomalia['valor']}: "
+                  f"${anomalia['importe']:,.2f} (mediana ${anomalia['mediana']:,.2f}, {anomalia['tipo']})")
     
     def generar_visualizaciones(self):
         """Genera visualizaciones básicas con matplotlib"""
+        import pandas as pd
+        plt = _configurar_estilo()
+
         print("\n📊 Generando visualizaciones...")
         
         # Configurar el estilo
@@ -340,7 +590,10 @@ class AnalisisVentas:
         
         # 9. Distribución de cantidades
         ax9 = plt.subplot(3, 3, 9)
-        cantidades = self.df['cantidad'].value_counts().sort_index()
+        if self.store is not None:
+            cantidades = pd.Series(self.store.measure('cantidad')).value_counts().sort_index()
+        else:
+            cantidades = self.agregados.cantidades()
         ax9.bar(cantidades.index, cantidades.values, color='#ef4444', alpha=0.8,
                edgecolor='white', linewidth=1)
         ax9.set_title('Distribución de Cantidades por Transacción', fontsize=14, fontweight='bold', pad=20)
@@ -352,15 +605,22 @@ class AnalisisVentas:
         plt.tight_layout()
         plt.subplots_adjust(top=0.95, hspace=0.3, wspace=0.3)
         
-        # Guardar la figura
-        plt.savefig('dashboard_analytics.png', dpi=300, bbox_inches='tight', 
+        # Guardar la figura (solo se reescribe si la imagen cambió)
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
                    facecolor='white', edgecolor='none')
-        print("✅ Visualizaciones guardadas en 'dashboard_analytics.png'")
+        if self.publicador.publicar('dashboard_analytics.png', buffer.getvalue()):
+            print("✅ Visualizaciones guardadas en 'dashboard_analytics.png'")
+        else:
+            print("✅ 'dashboard_analytics.png' sin cambios")
         
         return fig
     
     def exportar_datos_json(self):
         """Exporta los datos procesados a JSON para el dashboard"""
+        import numpy as np
+        import pandas as pd
+
         print("\n💾 Exportando datos a JSON...")
         
         # Asegurar que todos los valores sean serializables
@@ -393,10 +653,11 @@ class AnalisisVentas:
             else:
                 datos_exportar[key] = value
         
-        with open('datos_dashboard.json', 'w', encoding='utf-8') as f:
-            json.dump(datos_exportar, f, ensure_ascii=False, indent=2, default=str)
-        
-        print("✅ Datos exportados a 'datos_dashboard.json'")
+        if self.publicador.publicar_json('datos_dashboard.json', datos_exportar,
+                                         ensure_ascii=False, indent=2, default=str):
+            print("✅ Datos exportados a 'datos_dashboard.json'")
+        else:
+            print("✅ 'datos_dashboard.json' sin cambios")
     
     def generar_reporte_texto(self):
         """Genera un reporte de análisis en texto plano"""
@@ -457,18 +718,46 @@ class AnalisisVentas:
         dia_max = max(ventas_dia.keys(), key=lambda x: ventas_dia[x])
         reporte += f"- Día con mayores ventas: {dia_max} (${ventas_dia[dia_max]:,.2f})\n"
         
+        anomalias = self.datos_procesados.get('anomalias', [])
+        reporte += f"\n## DÍAS ANÓMALOS\n{'-'*30}\n"
+        if not anomalias:
+            reporte += "- No se detectaron días anómalos\n"
+        for anomalia in sorted(anomalias, key=lambda a: -abs(a['puntaje']))[:10]:
+            reporte += (f"- {anomalia['fecha']} {anomalia['dimension']}={anomalia['valor']}: "
+                        f"${anomalia['importe']:,.2f} vs mediana ${anomalia['mediana']:,.2f} "
+                        f"(puntaje {anomalia['puntaje']}, {anomalia['tipo']})\n")
+        
         reporte += f"\n{'='*50}\n"
         reporte += "Reporte generado automáticamente por Analytics Dashboard\n"
+        # La fecha de generación no cuenta para decidir si el reporte cambió
+        huella = reporte.encode('utf-8')
         reporte += f"Fecha de generación: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
         
-        with open('reporte_analisis.txt', 'w', encoding='utf-8') as f:
-            f.write(reporte)
-        
-        print("✅ Reporte generado: 'reporte_analisis.txt'")
+        if self.publicador.publicar('reporte_analisis.txt', reporte.encode('utf-8'), huella=huella):
+            print("✅ Reporte generado: 'reporte_analisis.txt'")
+        else:
+            print("✅ 'reporte_analisis.txt' sin cambios")
         return reporte
 
+def _detectar_formato_fecha(fechas):
+    """Formato de fecha del archivo, decidido con una muestra (None: se infiere)"""
+    from pandas.tseries.api import guess_datetime_format
+
+    from utils.schema import DEFAULT_MAPPING
+
+    formato = DEFAULT_MAPPING.detect_date_format(fechas, muestra=len(fechas))
+    if formato is None:
+        primera = fechas.dropna()
+        formato = guess_datetime_format(str(primera.iloc[0])) if len(primera) else None
+    if formato is None:
+        print("⚠️  No se reconoció el formato de fecha; se infiere en cada bloque")
+    return formato
+
+
 def main():
     """Función principal del programa"""
+    from utils.pipeline import run_concurrently
+
     print("🚀 DASHBOARD ANALYTICS COMERCIAL")
     print("="*50)
     print("Procesamiento y análisis de datos de ventas")
@@ -487,14 +776,15 @@ def main():
         # Procesar datos
         analisis.procesar_datos()
         
-        # Generar visualizaciones
-        fig = analisis.generar_visualizaciones()
-        
-        # Exportar datos JSON
-        analisis.exportar_datos_json()
-        
-        # Generar reporte de texto
-        reporte = analisis.generar_reporte_texto()
+        # Las tres salidas son independientes: JSON y reporte se escriben en
+        # segundo plano mientras matplotlib dibuja en el hilo principal
+        salidas = run_concurrently({
+            'visualizaciones': analisis.generar_visualizaciones,
+            'json': analisis.exportar_datos_json,
+            'reporte': analisis.generar_reporte_texto,
+        }, en_hilo_actual='visualizaciones')
+        fig = salidas['visualizaciones']
+        reporte = salidas['reporte']
         
         # Mostrar opciones adicionales
         print(f"\n🎉 ¡Procesamiento completado exitosamente!")
@@ -506,7 +796,7 @@ def main():
         # Opción de mostrar el gráfico
         mostrar = input("\n¿Desea mostrar las visualizaciones ahora? (s/n): ").lower().strip()
         if mostrar in ['s', 'si', 'yes', 'y']:
-            plt.show()
+            _configurar_estilo().show()
         
         print(f"\n✅ Proceso finalizado. ¡Gracias por usar Analytics Dashboard!")
         
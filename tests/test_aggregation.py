@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from main import AnalisisVentas  # noqa: E402
+from utils.aggregation import CUBE_KEYS, MEASURES, ChunkAggregator  # noqa: E402
+
+
+def _ventas():
+    return pd.DataFrame(
+        {
+            "fecha": pd.to_datetime(["2024-01-15", "2024-01-16", "2024-01-15", "2024-02-01", "2024-02-01"]),
+            "id_cliente": [1, 2, 1, 3, 2],
+            "nombre_cliente_final": ["Juan Pérez", "María García", "Juan P.", "Ana López", "María García"],
+            "ciudad": ["Madrid", "Barcelona", "Madrid", "Sevilla", "Barcelona"],
+            "id_producto": [101, 102, 101, 103, 102],
+            "nombre_producto": ["Producto A", "Producto B", "Producto A", "Producto C", "Producto B"],
+            "categoria_redefinida": ["Electrónicos", "Hogar", "Electrónicos", "Hogar", "Hogar"],
+            "cantidad": [2, 1, 3, 1, 2],
+            "importe": [200.50, 150.00, 300.75, None, 100.00],
+            "medio_pago": ["tarjeta", "efectivo", "tarjeta", "qr", "efectivo"],
+        }
+    )
+
+
+def test_chunked_partials_match_whole_frame():
+    df = _ventas()
+    agregados = ChunkAggregator()
+    for inicio in range(0, len(df), 2):
+        agregados.add(df.iloc[inicio:inicio + 2])
+
+    esperado = df.groupby(CUBE_KEYS)[MEASURES].sum().reset_index()
+    cubo = agregados.cubo().sort_values(CUBE_KEYS).reset_index(drop=True)
+    pd.testing.assert_frame_equal(cubo, esperado, check_dtype=False)
+
+    clientes = agregados.entidad("cliente")
+    assert list(clientes.index) == [1, 2, 3]
+    # First name seen wins, like Dimension.from_frame
+    assert clientes.loc[1, "nombre_cliente_final"] == "Juan Pérez"
+    assert clientes.loc[1, "importe"] == 501.25
+    assert agregados.filas == 5 and agregados.con_importe == 4
+    assert agregados.nulos["importe"] == 1
+    assert agregados.cantidades().to_dict() == {1: 2, 2: 2, 3: 1}
+
+
+def test_date_format_is_decided_once_for_all_chunks(tmp_path):
+    df = _ventas().drop(columns="fecha")
+    # 01/02 is ambiguous on its own; 13/02 in a later chunk is only valid day-first
+    df.insert(0, "fecha", ["01/02/2024", "01/02/2024", "13/02/2024", "13/02/2024", "13/02/2024"])
+    ruta = tmp_path / "ventas.csv"
+    df.to_csv(ruta, index=False)
+
+    analisis = AnalisisVentas(str(ruta), tamano_bloque=2, directorio_salida=str(tmp_path))
+    fechas = sorted(analisis.agregados.cubo()["fecha"].dt.strftime("%Y-%m-%d").unique())
+    assert fechas == ["2024-02-01", "2024-02-13"]
+
+
+def test_missing_columns_are_reported_before_aggregating(tmp_path, capsys):
+    ruta = tmp_path / "ventas.csv"
+    _ventas().drop(columns=["ciudad", "medio_pago"]).to_csv(ruta, index=False)
+
+    with pytest.raises(KeyError):
+        AnalisisVentas(str(ruta), directorio_salida=str(tmp_path))
+    salida = capsys.readouterr().out
+    assert "Columnas faltantes" in salida and "'ciudad'" in salida and "'medio_pago'" in salida
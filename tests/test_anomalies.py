@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.anomalies import detect_anomalies, rolling_median_mad  # noqa: E402
+
+
+def test_rolling_stats_match_per_series_rolling_median():
+    rng = np.random.default_rng(1)
+    matriz = rng.integers(1, 100, size=(3, 40)).astype(float)
+    stats = rolling_median_mad(matriz, ventana=7, bloque=2)
+    for i, fila in enumerate(matriz):
+        esperado = pd.Series(fila).rolling(7).median().shift(1).to_numpy()
+        np.testing.assert_allclose(stats["mediana"][i], esperado, equal_nan=True)
+
+
+def test_detect_anomalies_flags_spike_in_its_series_only():
+    dias = pd.date_range("2024-01-01", periods=30, freq="D")
+    rng = np.random.default_rng(0)
+    filas = []
+    for ciudad in ("Cordoba", "Rio Cuarto"):
+        for dia in dias:
+            importe = 1000 + rng.integers(-50, 50)
+            if ciudad == "Cordoba" and dia == dias[25]:
+                importe = 10_000
+            filas.append({"fecha": dia, "ciudad": ciudad, "importe": importe})
+    df = pd.DataFrame(filas)
+
+    anomalias = detect_anomalies(df, dimensiones=("ciudad",), incluir_total=False)
+    assert [(a["fecha"], a["valor"], a["tipo"]) for a in anomalias] == [("2024-01-26", "Cordoba", "alza")]
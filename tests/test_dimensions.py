@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.dimensions import UNKNOWN_CODE, Dimension, build_dimensions, encode_facts, load_star_schema, sum_by_code  # noqa: E402
+
+
+def test_dimension_encodes_ids_and_joins_names_for_top_n():
+    df = pd.DataFrame(
+        {
+            "id_producto": [20, 10, 20, 30, 10],
+            "nombre_producto": ["B", "A", "B", "C", "A"],
+            "importe": [5, 1, 5, 3, 1],
+        }
+    )
+    dim = Dimension.from_frame(df, "id_producto", ["nombre_producto"])
+    codes = dim.encode(df["id_producto"])
+
+    assert codes.dtype == np.int32
+    assert list(codes) == [1, 0, 1, 2, 0]
+    assert dim.encode([99])[0] == UNKNOWN_CODE
+    assert dim.top_n(codes, "nombre_producto", n=2, importe=df["importe"]) == [
+        {"nombre_producto": "B", "importe": 10},
+        {"nombre_producto": "C", "importe": 3},
+    ]
+
+
+def test_missing_values_are_skipped_like_groupby_sum():
+    df = pd.DataFrame({"ciudad": ["A", "B", "A", "B"], "importe": [10.0, np.nan, 5.0, 2.0]})
+    dim = Dimension.from_values(df["ciudad"], "ciudad")
+    totales = dim.aggregate(dim.encode(df["ciudad"]), importe=df["importe"])
+
+    assert list(totales["importe"]) == list(df.groupby("ciudad")["importe"].sum())
+    assert list(totales["importe"]) == [15.0, 2.0]
+
+
+def test_integer_sums_stay_exact_beyond_float_precision():
+    centavos = np.array([2**53, 1, 1], dtype=np.int64)
+    totales = sum_by_code(np.array([0, 0, 0]), centavos, 1)
+
+    assert totales.dtype == np.int64
+    assert totales[0] == 2**53 + 2
+
+
+def test_star_schema_totals_match_detalle():
+    dims, facts = load_star_schema(os.path.join(REPO_ROOT, "data"))
+    detalle = pd.read_csv(os.path.join(REPO_ROOT, "data", "detalle_ventas.csv"))
+
+    assert len(facts) == len(detalle)
+    assert not {"nombre_cliente", "email", "nombre_producto"} & set(facts.columns)
+    por_ciudad = dims["ciudad"].aggregate(facts["ciudad"], importe=facts["importe"])
+    assert int(por_ciudad["importe"].sum()) == int(detalle["importe"].sum())
+
+
+def test_encode_facts_detects_the_date_format():
+    data = os.path.join(REPO_ROOT, "data")
+    productos = pd.read_csv(os.path.join(data, "productos.csv"))
+    clientes = pd.read_csv(os.path.join(data, "clientes.csv"))
+    ventas = pd.read_csv(os.path.join(data, "ventas.csv"))
+    detalle = pd.read_csv(os.path.join(data, "detalle_ventas.csv"))
+
+    original = encode_facts(ventas, detalle, build_dimensions(productos, clientes))
+    # Same sales exported with ISO dates: nothing is lost to a hard-coded format
+    iso = ventas.assign(fecha=pd.to_datetime(ventas["fecha"], format="%m-%d-%y").dt.strftime("%Y-%m-%d"))
+    hechos = encode_facts(iso, detalle, build_dimensions(productos, clientes))
+    assert hechos["fecha"].notna().all()
+    assert hechos["fecha"].equals(original["fecha"])
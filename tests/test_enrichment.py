@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.enrichment import CategoryClassifier, enrich_products  # noqa: E402
+
+
+def test_classifier_uses_rule_priority_and_accents():
+    nombres = pd.Series(["Licor de Café 700ml", "Verduras Congeladas Mix", "Té Verde", "Tornillos x10"])
+    assert list(CategoryClassifier().classify(nombres)) == [
+        "BEBIDAS ALCOHÓLICAS",
+        "CONGELADOS",
+        "ALIMENTOS",
+        "OTROS",
+    ]
+
+
+def test_enrich_products_reclassifies_only_changed_products(tmp_path):
+    cache = str(tmp_path / "cache.json")
+    productos = pd.DataFrame({"id_producto": [1, 2], "nombre_producto": ["Leche Entera 1L", "Shampoo 400ml"]})
+
+    class CountingClassifier(CategoryClassifier):
+        vistos = []
+
+        def classify(self, names, normalized=False):
+            self.vistos.extend(names.tolist())
+            return super().classify(names, normalized)
+
+    clf = CountingClassifier()
+    primero = enrich_products(productos, cache_path=cache, classifier=clf)
+    assert list(primero["categoria_redefinida"]) == ["LÁCTEOS", "CUIDADO PERSONAL"]
+    assert len(clf.vistos) == 2
+
+    clf.vistos.clear()
+    productos.loc[1, "nombre_producto"] = "Cerveza Rubia 1L"
+    productos.loc[2] = [3, "Yerba Mate 1kg"]
+    segundo = enrich_products(productos, cache_path=cache, classifier=clf)
+    assert list(segundo["categoria_redefinida"]) == ["LÁCTEOS", "BEBIDAS ALCOHÓLICAS", "ALIMENTOS"]
+    assert clf.vistos == ["cerveza rubia 1l", "yerba mate 1kg"]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.data_utils import load_csv_safe  # noqa: E402
+from utils.fact_store import open_fact_store, write_fact_store  # noqa: E402
+
+
+def _ventas():
+    return pd.DataFrame(
+        {
+            "fecha": ["2024-01-15", "2024-01-16", "2024-02-01"],
+            "id_cliente": [1, 2, 1],
+            "nombre_cliente_final": ["Juan Pérez", "María García", "Juan Pérez"],
+            "ciudad": ["Madrid", "Barcelona", "Madrid"],
+            "id_producto": [101, 102, 101],
+            "nombre_producto": ["Producto A", "Producto B", "Producto A"],
+            "categoria_redefinida": ["Electrónicos", "Hogar", "Electrónicos"],
+            "cantidad": [2, 1, 3],
+            "importe": [200.50, 150.00, 300.75],
+            "medio_pago": ["tarjeta", "efectivo", "tarjeta"],
+        }
+    )
+
+
+def test_fact_store_round_trip_and_streaming_aggregate(tmp_path):
+    df = _ventas()
+    ruta = write_fact_store(df, str(tmp_path / "ventas"))
+    store = open_fact_store(ruta)
+
+    assert isinstance(store.hechos, np.memmap)
+    assert store.fechas()[0] == np.datetime64("2024-01-15")
+
+    por_ciudad = store.aggregate("ciudad", chunk_rows=2).set_index("ciudad")
+    assert por_ciudad.loc["Madrid", "importe"] == 501.25
+    assert por_ciudad.loc["Madrid", "cantidad"] == 5
+
+    cargado = load_csv_safe(ruta)
+    assert list(cargado["nombre_cliente_final"].astype(str)) == list(df["nombre_cliente_final"])
+    assert list(cargado["id_producto"]) == [101, 102, 101]
+
+
+def test_rewrite_switches_generation_and_daily_totals(tmp_path):
+    df = _ventas()
+    ruta = write_fact_store(df, str(tmp_path / "ventas"))
+    viejo = open_fact_store(ruta)
+    write_fact_store(df.iloc[:2], ruta)
+    nuevo = open_fact_store(ruta)
+
+    # The old mapping keeps its generation; the directory holds only the new one
+    assert len(viejo) == 3 and len(nuevo) == 2
+    assert [f for f in os.listdir(ruta) if f.endswith(".bin")] == [os.path.basename(nuevo.hechos.filename)]
+
+    diario = viejo.daily()
+    assert list(diario["fecha"].dt.strftime("%Y-%m-%d")) == ["2024-01-15", "2024-01-16", "2024-02-01"]
+    assert list(diario["importe"]) == [200.50, 150.00, 300.75]
+    assert viejo.distinct("cliente") == 2 and nuevo.distinct("ciudad") == 2
+
+
+def test_missing_values_round_trip_like_the_csv(tmp_path):
+    from main import AnalisisVentas
+
+    df = _ventas()
+    df.insert(0, "id_venta", [1.0, np.nan, 3.0])
+    df.loc[0, "fecha"] = None
+    df.loc[1, "cantidad"] = np.nan
+    csv = tmp_path / "ventas.csv"
+    df.to_csv(csv, index=False)
+    ruta = write_fact_store(load_csv_safe(str(csv)), str(tmp_path / "ventas"))
+
+    store = open_fact_store(ruta)
+    dias, dia = store.days()
+    assert list(dia) == [-1, 0, 16] and len(dias) == 17
+    assert store.daily()["cantidad"].tolist() == [0, 3]
+    cargado = store.to_frame()
+    assert cargado["id_venta"].isna().tolist() == [False, True, False]
+    assert cargado["fecha"].isna().tolist() == [True, False, False]
+    assert cargado["cantidad"].isna().tolist() == [False, True, False]
+
+    resumenes = []
+    for origen in (str(csv), ruta):
+        analisis = AnalisisVentas(origen, directorio_salida=str(tmp_path), publicar_deltas=False)
+        analisis.procesar_datos()
+        resumenes.append(analisis.datos_procesados["resumen"])
+    assert resumenes[0] == resumenes[1]
+    assert resumenes[1]["total_cantidad"] == 5 and resumenes[1]["fecha_inicio"] == "2024-01-16"
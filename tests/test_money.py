@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.data_utils import load_csv_safe  # noqa: E402
+from utils.money import check_importe_consistency, from_cents, read_money_columns_as_text, to_cents  # noqa: E402
+
+
+def test_to_cents_parses_text_exactly():
+    texto = pd.Series(["200.50", "1,234.5", "-3.005", ".07", "12"])
+    assert list(to_cents(texto)) == [20050, 123450, -301, 7, 1200]
+    assert list(to_cents(pd.Series([0.1, 0.2]))) == [10, 20]
+    assert to_cents(pd.Series([0.1] * 10)).sum() == 100
+    with pytest.raises(ValueError):
+        to_cents(pd.Series(["abc", None]))
+
+
+def test_float_and_text_round_half_cents_the_same_way():
+    valores = [0.125, -0.125, 1.005, -0.005, 2.675]
+    texto = pd.Series([f"{v:.3f}" for v in valores])
+    assert list(to_cents(pd.Series(valores))) == list(to_cents(texto)) == [13, -13, 101, -1, 268]
+
+
+def test_cents_mode_loads_files_with_missing_importe(tmp_path):
+    from main import AnalisisVentas
+
+    ruta = tmp_path / "ventas.csv"
+    ruta.write_text(
+        "fecha,id_cliente,nombre_cliente_final,ciudad,id_producto,nombre_producto,categoria_redefinida,cantidad,importe,medio_pago\n"
+        "2024-01-15,1,Juan,Madrid,101,A,X,2,200.50,tarjeta\n"
+        "2024-01-16,2,Maria,Barcelona,102,B,Y,1,,efectivo\n"
+    )
+    resumenes = []
+    for modo in ("float", "centavos"):
+        analisis = AnalisisVentas(str(ruta), modo_dinero=modo, directorio_salida=str(tmp_path))
+        analisis.procesar_datos()
+        resumenes.append(analisis.datos_procesados["resumen"])
+    assert resumenes[0] == resumenes[1]
+    assert resumenes[1]["total_ventas"] == 200.50 and resumenes[1]["promedio_venta"] == 200.50
+
+    # Materializing the frame re-reads the file but must not count the blank amount again
+    analisis.frame()
+    analisis.procesar_datos()
+    assert analisis._importes_invalidos == 1
+    assert analisis.datos_procesados["resumen"] == resumenes[1]
+
+
+def test_incomplete_rows_are_not_reported_as_inconsistent():
+    detalle = pd.DataFrame({
+        "cantidad": [2, np.nan, 1, 3],
+        "precio_unitario": ["10.00", "5.00", "7.00", "4.00"],
+        "importe": ["20.00", "5.00", None, "13.00"],
+    })
+    inconsistentes = check_importe_consistency(detalle)
+    assert list(inconsistentes.index) == [3]
+    assert inconsistentes.attrs["incompletas"] == 2
+
+    centavos = detalle.assign(cantidad=detalle["cantidad"], precio_unitario=to_cents(detalle["precio_unitario"]),
+                              importe=to_cents(detalle["importe"], errors="coerce"))
+    en_centavos = check_importe_consistency(centavos, en_centavos=True, incompletas=detalle["importe"].isna().to_numpy())
+    assert list(en_centavos.index) == [3] and en_centavos.attrs["incompletas"] == 2
+
+
+def test_integer_cents_sum_has_no_float_drift():
+    importes = pd.Series(["0.10"] * 1000 + ["0.20"] * 1000)
+    assert from_cents(to_cents(importes).sum()) == 300.0
+    assert importes.astype(float).sum() != 300.0
+
+
+def test_detalle_ventas_is_consistent():
+    detalle = load_csv_safe(os.path.join(REPO_ROOT, "data", "detalle_ventas.csv"), dtype=read_money_columns_as_text())
+    assert check_importe_consistency(detalle).empty
+
+    roto = detalle.copy()
+    roto.loc[0, "importe"] = "1.01"
+    inconsistentes = check_importe_consistency(roto)
+    assert list(inconsistentes.index) == [0]
+    assert np.isclose(inconsistentes["diferencia"].iloc[0], 1.01 - float(detalle.loc[0, "importe"]))
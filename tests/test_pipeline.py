@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import os
+import sys
+import threading
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.pipeline import prefetch, read_csv_chunks, run_concurrently  # noqa: E402
+
+
+def test_prefetch_preserves_order_and_propagates_errors():
+    assert list(prefetch(range(10), maxsize=1)) == list(range(10))
+
+    def falla():
+        yield 1
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        list(prefetch(falla()))
+
+
+def test_prefetch_closes_the_producer_before_an_early_exit_returns():
+    cerrado = []
+
+    def productor():
+        try:
+            for i in range(100):
+                yield i
+        finally:
+            cerrado.append(threading.current_thread().name)
+
+    with pytest.raises(RuntimeError):
+        for _ in prefetch(productor(), maxsize=1):
+            raise RuntimeError("falla el consumidor")
+    # The generator was closed on the producer thread before the consumer went on
+    assert cerrado == ["prefetch"]
+
+
+@pytest.mark.parametrize("read_ahead", [False, True])
+def test_read_csv_chunks_reads_all_rows(tmp_path, read_ahead):
+    ruta = tmp_path / "datos.csv"
+    ruta.write_text("a,b\n" + "".join(f"{i},{i * 2}\n" for i in range(25)), encoding="utf-8")
+    bloques = list(read_csv_chunks(str(ruta), chunksize=10, read_ahead=read_ahead))
+    assert [len(b) for b in bloques] == [10, 10, 5]
+    assert int(sum(b["b"].sum() for b in bloques)) == sum(i * 2 for i in range(25))
+
+
+def test_run_concurrently_keeps_named_task_on_calling_thread():
+    principal = threading.get_ident()
+    resultados = run_concurrently(
+        {
+            "figura": lambda: threading.get_ident(),
+            "json": lambda: threading.get_ident(),
+        },
+        en_hilo_actual="figura",
+    )
+    assert resultados["figura"] == principal
+    assert resultados["json"] != principal
+
+    with pytest.raises(RuntimeError):
+        run_concurrently({"ok": lambda: 1, "mal": lambda: (_ for _ in ()).throw(RuntimeError("x"))})
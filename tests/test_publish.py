@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.publish import Publicador, json_patch  # noqa: E402
+
+
+def _apply(doc, ops):
+    """Minimal JSON Patch applier for the ops json_patch emits."""
+    if any(op["path"] == "" for op in ops):
+        return ops[-1]["value"]
+    for op in ops:
+        partes = [p.replace("~1", "/").replace("~0", "~") for p in op["path"].split("/")[1:]]
+        destino = doc
+        for p in partes[:-1]:
+            destino = destino[int(p)] if isinstance(destino, list) else destino[p]
+        clave = int(partes[-1]) if isinstance(destino, list) else partes[-1]
+        if op["op"] == "remove":
+            del destino[clave]
+        else:
+            destino[clave] = op["value"]
+    return doc
+
+
+def test_json_patch_round_trip():
+    antes = {"resumen": {"total": 1, "viejo": 2}, "lista": [1, 2], "a/b": 0}
+    despues = {"resumen": {"total": 3}, "lista": [1, 5], "a/b": 1, "nuevo": [1]}
+    assert _apply(json.loads(json.dumps(antes)), json_patch(antes, despues)) == despues
+
+
+def test_publicador_skips_unchanged_and_writes_delta(tmp_path):
+    pub = Publicador(str(tmp_path))
+    assert pub.publicar_json("datos.json", {"total": 1}) is True
+    assert Publicador(str(tmp_path)).publicar_json("datos.json", {"total": 1}) is False
+
+    assert pub.publicar_json("datos.json", {"total": 2}) is True
+    manifest = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+    entrada = manifest["artefactos"]["datos.json"]
+    assert (tmp_path / entrada["archivo"]).exists()
+    assert json.loads((tmp_path / "datos.json").read_text(encoding="utf-8")) == {"total": 2}
+    delta = json.loads((tmp_path / entrada["delta"]["archivo"]).read_text(encoding="utf-8"))
+    assert delta == [{"op": "replace", "path": "/total", "value": 2}]
+
+    pub.publicar_json("datos.json", {"total": 3})
+    hashed = sorted(f for f in os.listdir(tmp_path) if f.startswith("datos.") and f.count(".") == 2)
+    assert len(hashed) == 2  # current + previous are kept
+
+
+def test_publicador_hashes_huella_only(tmp_path):
+    pub = Publicador(str(tmp_path))
+    assert pub.publicar("reporte.txt", b"cuerpo\nfecha 1\n", huella=b"cuerpo\n") is True
+    assert pub.publicar("reporte.txt", b"cuerpo\nfecha 2\n", huella=b"cuerpo\n") is False
+    assert (tmp_path / "reporte.txt").read_bytes() == b"cuerpo\nfecha 1\n"
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.schema import CANONICAL_SCHEMA, SchemaMapping, main, merge_sources, normalize_source, parse_sources  # noqa: E402
+
+
+def test_ventas_csv_dates_and_aliases():
+    ventas = normalize_source(os.path.join(REPO_ROOT, "data", "ventas.csv"))
+    assert ventas["fecha"].notna().all()
+    assert ventas.loc[0, "fecha"] == pd.Timestamp("2024-06-19")
+    assert ventas.loc[0, "nombre_cliente_final"] == "Guadalupe Romero"
+    assert ventas["importe"].isna().all()
+    assert list(ventas.columns) == ["fuente", *CANONICAL_SCHEMA, "linea"]
+    assert str(ventas["id_cliente"].dtype) == "Int64"
+
+
+def test_detect_date_format_prefers_unambiguous_match():
+    mapping = SchemaMapping()
+    assert mapping.detect_date_format(pd.Series(["2024-01-15", None])) == "%Y-%m-%d"
+    assert mapping.detect_date_format(pd.Series(["01-02-24", "12-31-24"])) == "%m-%d-%y"
+    assert mapping.detect_date_format(pd.Series(["31/12/2024"])) == "%d/%m/%Y"
+
+
+def test_merge_dedups_reexports_and_keeps_repeated_lines(tmp_path):
+    a = tmp_path / "sucursal_a.csv"
+    a.write_text(
+        "id_venta,fecha,id_producto,cantidad,importe,medio_pago\n"
+        "1,2024-01-15,10,1,100,tarjeta\n"
+        "1,2024-01-15,10,2,200,tarjeta\n"
+        "2,2024-01-16,11,1,50,qr\n",
+        encoding="utf-8",
+    )
+    # Same branch re-exported with other headers and dates; sale 2 was corrected.
+    a2 = tmp_path / "sucursal_a_v2.csv"
+    a2.write_text(
+        "Venta_ID,Fecha Venta,SKU,Unidades,Monto,Forma_Pago\n"
+        "1,01-15-24,10,1,100, tarjeta \n"
+        "1,01-15-24,10,2,200,tarjeta\n"
+        "2,01-16-24,11,1,55,qr\n",
+        encoding="utf-8",
+    )
+    b = tmp_path / "sucursal_b.csv"
+    b.write_text("id_venta,fecha,id_producto,cantidad,importe\n1,2024-01-15,10,1,100\n", encoding="utf-8")
+
+    unificado = merge_sources({"a": [str(a), str(a2)], "b": str(b)})
+    assert unificado.attrs["duplicados"] == 3
+    assert len(unificado) == 4
+    assert unificado.groupby("fuente")["importe"].sum().to_dict() == {"a": 355.0, "b": 100.0}
+    assert set(unificado["medio_pago"].dropna()) == {"tarjeta", "qr"}
+    assert unificado["fecha"].notna().all()
+
+
+def test_unmapped_rows_fractions_and_raw_category(tmp_path):
+    sin_mapeo = tmp_path / "otro.csv"
+    sin_mapeo.write_text("x,y\n1,2\n3,4\n5,6\n", encoding="utf-8")
+    assert len(normalize_source(str(sin_mapeo))) == 3
+
+    ruta = tmp_path / "rubros.csv"
+    ruta.write_text("id_venta,fecha,cantidad,importe,rubro\n1,2024-01-01,1.5,10,Bebidas\n2,2024-01-02,2,20,Hogar\n", encoding="utf-8")
+    ventas = normalize_source(str(ruta))
+    assert ventas["cantidad"].isna().tolist() == [True, False] and ventas.loc[1, "cantidad"] == 2
+    # The source category is not taken for the re-labelled one
+    assert list(ventas["categoria"]) == ["Bebidas", "Hogar"]
+    assert ventas["categoria_redefinida"].isna().all()
+
+
+def test_cli_dedups_across_files_of_a_named_source(tmp_path):
+    cabecera = "id_venta,fecha,id_producto,cantidad,importe\n"
+    filas = "".join(f"{i},2024-01-{i:02d},10,1,{i * 10}\n" for i in range(1, 6))
+    s1, reexport = tmp_path / "s1.csv", tmp_path / "s1_reexport.csv"
+    s1.write_text(cabecera + filas, encoding="utf-8")
+    reexport.write_text(cabecera + filas + "6,2024-01-06,10,1,60\n", encoding="utf-8")
+    salida = tmp_path / "unificado.csv"
+
+    # By default every file is its own source, so nothing matches across them
+    assert main([str(s1), str(reexport), "-o", str(salida)]) == 0
+    assert len(pd.read_csv(salida)) == 11
+
+    assert main([f"s1={s1}", f"s1={reexport}", "-o", str(salida)]) == 0
+    unificado = pd.read_csv(salida)
+    assert len(unificado) == 6 and set(unificado["fuente"]) == {"s1"}
+
+    assert main(["--fuente", "s1", str(s1), str(reexport), "-o", str(salida)]) == 0
+    assert len(pd.read_csv(salida)) == 6
+
+    assert parse_sources([str(s1), f"b={reexport}"]) == [("s1", str(s1)), ("b", str(reexport))]
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.bench_startup import ENTRY_MODULES, heavy_modules_loaded  # noqa: E402
+
+
+def test_entry_points_do_not_import_heavy_libraries():
+    """Importing any entry point must not load pandas/numpy/matplotlib/seaborn."""
+    for module in ENTRY_MODULES:
+        assert heavy_modules_loaded(module) == [], f"{module} imports heavy libraries at startup"
+
+
+def test_main2_help_skips_pandas():
+    code = (
+        "import sys, runpy; sys.argv = ['main2.py', '--help']\n"
+        "try:\n"
+        "    runpy.run_path('main2.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print('pandas' in sys.modules)"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert proc.stdout.strip().splitlines()[-1] == "False"
@@ -0,0 +1,131 @@
+# utils/aggregation.py
+"""
+Streaming aggregation of sales chunks.
+
+``ChunkAggregator.add`` folds every chunk into small partial tables as soon as
+it is read, while the next chunk is being read in the background (see
+``utils/pipeline.read_csv_chunks``), and ``ChunkAggregator`` merges the
+partials on demand. No full-size frame is kept: memory is bounded by the chunk
+size plus the number of distinct (day, category, city, payment method) cells,
+products and clients.
+
+The ``cubo`` (sums per day x category x city x payment method) is enough for
+every per-dimension total, the daily series and anomaly detection: summing
+pre-aggregated rows gives the same totals as summing the raw rows.
+"""
+from __future__ import annotations
+
+import logging
+from typing import List, Optional
+
+import pandas as pd
+
+from utils.data_utils import ensure_columns
+
+logger = logging.getLogger(__name__)
+
+CUBE_KEYS = ["fecha", "categoria_redefinida", "ciudad", "medio_pago"]
+MEASURES = ["importe", "cantidad"]
+ENTITIES = {"producto": ("id_producto", "nombre_producto"), "cliente": ("id_cliente", "nombre_cliente_final")}
+REQUIRED_COLUMNS = CUBE_KEYS + MEASURES + [c for par in ENTITIES.values() for c in par]
+
+# Partials are merged every this many chunks so the lists stay short.
+COMPACT_EVERY = 8
+
+
+class ChunkAggregator:
+    """Accumulates partial sums, null counts and distinct keys chunk by chunk."""
+
+    def __init__(self):
+        self.filas = 0
+        self.con_importe = 0
+        self.columnas: Optional[List[str]] = None
+        self.dtypes: Optional[pd.Series] = None
+        self.nulos: Optional[pd.Series] = None
+        self._cubos: List[pd.DataFrame] = []
+        self._entidades = {nombre: [] for nombre in ENTITIES}
+        self._nombres = {nombre: [] for nombre in ENTITIES}
+        self._cantidades: List[pd.Series] = []
+
+    def add(self, bloque: pd.DataFrame) -> None:
+        """Fold ``bloque`` (dates already parsed) into the partial tables."""
+        missing = ensure_columns(bloque, REQUIRED_COLUMNS)
+        if missing:
+            raise KeyError(f"Columns not found: {missing}")
+        if self.columnas is None:
+            self.columnas, self.dtypes = list(bloque.columns), bloque.dtypes
+        nulos = len(bloque) - bloque.count()
+        self.nulos = nulos if self.nulos is None else self.nulos.add(nulos, fill_value=0).astype("int64")
+        self.filas += len(bloque)
+        self.con_importe += int(bloque["importe"].notna().sum())
+
+        self._cubos.append(bloque.groupby(CUBE_KEYS, dropna=False, sort=False)[MEASURES].sum())
+        for nombre, (clave, etiqueta) in ENTITIES.items():
+            self._entidades[nombre].append(bloque.groupby(clave)[MEASURES].sum())
+            # Only the first name per id is kept; names are joined back at the end
+            self._nombres[nombre].append(bloque[[clave, etiqueta]].drop_duplicates(clave).dropna(subset=[clave]))
+        self._cantidades.append(bloque["cantidad"].value_counts())
+        if len(self._cubos) >= COMPACT_EVERY:
+            self._compactar()
+
+    def _compactar(self) -> None:
+        self._cubos = [_sumar_cubos(self._cubos)]
+        for nombre, (clave, etiqueta) in ENTITIES.items():
+            self._entidades[nombre] = [_sumar_parciales(self._entidades[nombre], MEASURES)]
+            self._nombres[nombre] = [_primeros(self._nombres[nombre], clave, etiqueta)]
+        self._cantidades = [_sumar_conteos(self._cantidades)]
+
+    def cubo(self) -> pd.DataFrame:
+        """Sums per (fecha, categoria_redefinida, ciudad, medio_pago), one row per cell with sales."""
+        self._compactar()
+        return self._cubos[0].reset_index()
+
+    def entidad(self, nombre: str) -> pd.DataFrame:
+        """
+        Sums per ``id_producto`` or ``id_cliente`` (sorted by id) with the first
+        name seen for each id.
+        """
+        self._compactar()
+        clave, etiqueta = ENTITIES[nombre]
+        nombres = self._nombres[nombre][0].set_index(clave)[etiqueta]
+        totales = self._entidades[nombre][0].sort_index()
+        totales.insert(0, etiqueta, nombres.reindex(totales.index).to_numpy())
+        return totales
+
+    def cantidades(self) -> pd.Series:
+        """Number of rows per ``cantidad`` value."""
+        self._compactar()
+        return self._cantidades[0].sort_index()
+
+
+def _sumar_cubos(cubos: List[pd.DataFrame]) -> pd.DataFrame:
+    if not cubos:
+        return pd.DataFrame(columns=CUBE_KEYS + MEASURES).set_index(CUBE_KEYS)
+    if len(cubos) == 1:
+        return cubos[0]
+    return pd.concat(cubos).groupby(level=CUBE_KEYS, dropna=False, sort=False).sum()
+
+
+def _sumar_parciales(partes: List[pd.DataFrame], columnas: List[str]) -> pd.DataFrame:
+    if not partes:
+        return pd.DataFrame(columns=columnas)
+    if len(partes) == 1:
+        return partes[0]
+    return pd.concat(partes).groupby(level=0).sum()
+
+
+def _primeros(partes: List[pd.DataFrame], clave: str, etiqueta: str) -> pd.DataFrame:
+    if not partes:
+        return pd.DataFrame(columns=[clave, etiqueta])
+    if len(partes) == 1:
+        return partes[0]
+    # Chunks arrive in file order, so keep="first" keeps the first name seen per id
+    return pd.concat(partes, ignore_index=True).drop_duplicates(clave, keep="first")
+
+
+def _sumar_conteos(conteos: List[pd.Series]) -> pd.Series:
+    if not conteos:
+        return pd.Series(dtype="int64")
+    if len(conteos) == 1:
+        return conteos[0]
+    return pd.concat(conteos).groupby(level=0).sum()
@@ -0,0 +1,193 @@
+# utils/anomalies.py
+"""
+Anomaly detection over daily sales with rolling robust statistics.
+
+Every daily series (one per city, category, payment method, ... plus the
+overall total) is laid out as one row of a dense 2-D ``series x days`` array.
+Rolling median and MAD over the previous ``ventana`` days are computed for all
+rows at once on a ``sliding_window_view`` (processed in row blocks to bound
+memory), and a day is flagged when its robust z-score exceeds ``umbral``.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.data_utils import ensure_columns
+
+logger = logging.getLogger(__name__)
+
+# 1 / Phi^-1(3/4): scales MAD to a standard deviation under normality.
+MAD_SCALE = 1.4826
+# sqrt(pi / 2): same for the mean absolute deviation, used when MAD is 0.
+MEANAD_SCALE = 1.2533
+TOTAL = "total"
+
+
+def daily_matrix(
+    df: pd.DataFrame,
+    dimension: Optional[str],
+    dias: pd.DatetimeIndex,
+    valor: str = "importe",
+    valores: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum ``valor`` per (member of ``dimension``, day) into a dense float matrix.
+
+    Returns ``(labels, matrix)`` with ``matrix.shape == (len(labels), len(dias))``;
+    days without sales are 0. ``dimension=None`` builds the single total series.
+    """
+    dia = ((df["fecha"].to_numpy().astype("datetime64[D]") - dias[0].to_datetime64().astype("datetime64[D]"))
+           .astype(np.int64))
+    pesos = df[valor].to_numpy() if valores is None else valores
+    if dimension is None:
+        codigos, etiquetas = np.zeros(len(df), dtype=np.int64), np.array([TOTAL], dtype=object)
+    else:
+        codigos, etiquetas = pd.factorize(df[dimension], sort=True)
+        etiquetas = np.asarray(etiquetas, dtype=object)
+    return etiquetas, coded_matrix(codigos, len(etiquetas), dia, len(dias), pesos)
+
+
+def coded_matrix(codigos: np.ndarray, cantidad_series: int, dia: np.ndarray, cantidad_dias: int, pesos) -> np.ndarray:
+    """
+    Same as ``daily_matrix`` for rows already encoded: ``codigos`` (negative =
+    unknown) and ``dia`` (day offset from the first day). NaN values are skipped.
+    """
+    pesos = np.asarray(pesos, dtype=np.float64)
+    validos = (codigos >= 0) & (dia >= 0) & (dia < cantidad_dias) & ~np.isnan(pesos)
+    plano = codigos[validos].astype(np.int64) * cantidad_dias + dia[validos]
+    matriz = np.bincount(plano, weights=pesos[validos], minlength=cantidad_series * cantidad_dias)
+    return matriz.reshape(cantidad_series, cantidad_dias)
+
+
+def rolling_median_mad(matriz: np.ndarray, ventana: int, bloque: int = 2048) -> Dict[str, np.ndarray]:
+    """
+    Rolling median, MAD, mean absolute deviation and active-day count over the
+    previous ``ventana`` days (the current day is excluded), for every row at once.
+
+    The first ``ventana`` days have no complete window and are NaN.
+    """
+    if ventana < 1:
+        raise ValueError("ventana must be >= 1")
+    filas, dias = matriz.shape
+    salida = {k: np.full((filas, dias), np.nan) for k in ("mediana", "mad", "meanad")}
+    salida["activos"] = np.zeros((filas, dias), dtype=np.int64)
+    if dias <= ventana:
+        return salida
+    # Window j covers days j .. j+ventana-1 and scores day j+ventana; it is a view, not a copy.
+    ventanas = sliding_window_view(matriz[:, :-1], ventana, axis=1)
+    for inicio in range(0, filas, bloque):
+        fin = inicio + bloque
+        v = ventanas[inicio:fin]
+        mediana = np.median(v, axis=-1)
+        desvio = np.abs(v - mediana[..., None])
+        salida["mediana"][inicio:fin, ventana:] = mediana
+        salida["mad"][inicio:fin, ventana:] = np.median(desvio, axis=-1)
+        salida["meanad"][inicio:fin, ventana:] = desvio.mean(axis=-1)
+        salida["activos"][inicio:fin, ventana:] = np.count_nonzero(v, axis=-1)
+    return salida
+
+
+def robust_scores(matriz: np.ndarray, stats: Dict[str, np.ndarray], min_activos: int) -> np.ndarray:
+    """
+    Robust z-score per cell.
+
+    NaN where the window is incomplete, has fewer than ``min_activos`` days
+    with sales (sparse series, where any sale would look like a spike) or has
+    no spread at all.
+    """
+    escala = MAD_SCALE * stats["mad"]
+    sin_mad = ~(escala > 0)
+    escala[sin_mad] = MEANAD_SCALE * stats["meanad"][sin_mad]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        puntaje = (matriz - stats["mediana"]) / escala
+    puntaje[~(escala > 0) | (stats["activos"] < min_activos)] = np.nan
+    return puntaje
+
+
+def detect_anomalies(
+    df: pd.DataFrame,
+    dimensiones: Sequence[str] = ("ciudad", "categoria_redefinida", "medio_pago"),
+    valor: str = "importe",
+    valores: Optional[np.ndarray] = None,
+    ventana: int = 14,
+    umbral: float = 3.5,
+    min_activos: int = 7,
+    incluir_total: bool = True,
+) -> List[dict]:
+    """
+    Flag anomalous days across all daily series of ``dimensiones`` in one pass.
+
+    ``valores`` optionally overrides ``df[valor]`` (e.g. amounts converted
+    from cents). Days are scored against the previous ``ventana`` days; series
+    with fewer than ``min_activos`` selling days in the window are skipped.
+    Returns records sorted by date with the series, the day's
+    value, the rolling median and the robust score.
+    """
+    missing = ensure_columns(df, ["fecha", valor, *dimensiones])
+    if missing:
+        raise KeyError(f"Columns not found: {missing}")
+    if df.empty:
+        return []
+    fechas = pd.to_datetime(df["fecha"])
+    dias = pd.date_range(fechas.min().normalize(), fechas.max().normalize(), freq="D")
+    dia = (fechas.to_numpy().astype("datetime64[D]") - dias[0].to_datetime64().astype("datetime64[D]")).astype(np.int64)
+    series = {}
+    for dimension in dimensiones:
+        codigos, etiquetas = pd.factorize(df[dimension], sort=True)
+        series[dimension] = (codigos, np.asarray(etiquetas, dtype=object))
+    return detect_anomalies_coded(
+        dia, dias, series, df[valor].to_numpy() if valores is None else valores, valor=valor,
+        ventana=ventana, umbral=umbral, min_activos=min_activos, incluir_total=incluir_total)
+
+
+def detect_anomalies_coded(
+    dia: np.ndarray,
+    dias: pd.DatetimeIndex,
+    series: Dict[str, Tuple[np.ndarray, np.ndarray]],
+    valores: np.ndarray,
+    valor: str = "importe",
+    ventana: int = 14,
+    umbral: float = 3.5,
+    min_activos: int = 7,
+    incluir_total: bool = True,
+) -> List[dict]:
+    """
+    ``detect_anomalies`` over rows that are already encoded, e.g. the columns
+    of a memory-mapped fact store: ``dia`` is each row's offset into ``dias``
+    and ``series`` maps a dimension name to ``(codes, labels)``.
+    """
+    nombres, etiquetas, bloques = [], [], []
+    if incluir_total:
+        nombres.append(TOTAL)
+        etiquetas.append(TOTAL)
+        bloques.append(coded_matrix(np.zeros(len(dia), dtype=np.int64), 1, dia, len(dias), valores))
+    for dimension, (codigos, nombres_serie) in series.items():
+        nombres.extend([dimension] * len(nombres_serie))
+        etiquetas.extend(list(nombres_serie))
+        bloques.append(coded_matrix(codigos, len(nombres_serie), dia, len(dias), valores))
+    matriz = np.vstack(bloques)
+
+    stats = rolling_median_mad(matriz, ventana)
+    puntaje = robust_scores(matriz, stats, min_activos)
+    with np.errstate(invalid="ignore"):
+        filas, columnas = np.nonzero(np.abs(puntaje) > umbral)
+    logger.info("detect_anomalies: %d series x %d days, %d anomalous cells", matriz.shape[0], len(dias), len(filas))
+
+    orden = np.lexsort((filas, columnas))
+    return [
+        {
+            "fecha": str(dias[c].date()),
+            "dimension": nombres[f],
+            "valor": etiquetas[f],
+            valor: float(matriz[f, c]),
+            "mediana": float(stats["mediana"][f, c]),
+            "puntaje": round(float(puntaje[f, c]), 2),
+            "tipo": "alza" if puntaje[f, c] > 0 else "baja",
+        }
+        for f, c in zip(filas[orden], columnas[orden])
+    ]
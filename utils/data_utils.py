@@ -9,9 +9,10 @@ import json
 import logging
 import os
 import tempfile
-from typing import Iterable, List, Optional
+from typing import TYPE_CHECKING, Iterable, List, Optional
 
-import pandas as pd
+if TYPE_CHECKING:  # pandas is imported lazily so CLI startup stays cheap
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +21,20 @@ class DataLoadError(Exception):
     """Raised when a CSV cannot be loaded or validated."""
 
 
-def load_csv_safe(path: str, encoding: str = "utf-8", low_memory: bool = False) -> pd.DataFrame:
+def load_csv_safe(
+    path: str,
+    encoding: str = "utf-8",
+    low_memory: bool = False,
+    dtype: Optional[dict] = None,
+    usecols: Optional[List[str]] = None,
+) -> pd.DataFrame:
     """
     Load a CSV file with common sanity checks.
 
+    ``path`` may also be a memory-mapped fact store directory (``*.facts``, see
+    utils/fact_store.py); it is opened read-only and returned as a DataFrame.
+    ``usecols`` restricts parsing to those CSV columns.
+
     Raises:
       FileNotFoundError
       pd.errors.EmptyDataError
@@ -32,12 +43,22 @@ def load_csv_safe(path: str, encoding: str = "utf-8", low_memory: bool = False)
       PermissionError
       DataLoadError (for other unexpected errors)
     """
+    import pandas as pd
+
     if not os.path.exists(path):
         logger.debug("load_csv_safe: file not found: %s", path)
         raise FileNotFoundError(path)
 
+    if os.path.isdir(path):
+        from utils.fact_store import is_fact_store, open_fact_store
+
+        if is_fact_store(path):
+            df = open_fact_store(path).to_frame()
+            logger.debug("load_csv_safe: mapped fact store %s (%s rows)", path, df.shape[0])
+            return df
+
     try:
-        df = pd.read_csv(path, encoding=encoding, low_memory=low_memory)
+        df = pd.read_csv(path, encoding=encoding, low_memory=low_memory, dtype=dtype, usecols=usecols)
         logger.debug("load_csv_safe: loaded %s rows, %s cols from %s", df.shape[0], df.shape[1], path)
         return df
     except pd.errors.EmptyDataError:
@@ -76,6 +97,8 @@ def to_numeric_safe(df: pd.DataFrame, column: str, errors: str = "coerce") -> pd
     Safely coerce a column to numeric, returning the coerced Series.
     Non-convertible values become NaN when errors='coerce'.
     """
+    import pandas as pd
+
     if column not in df.columns:
         logger.debug("to_numeric_safe: column not found: %s", column)
         raise KeyError(f"Column not found: {column}")
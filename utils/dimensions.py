@@ -0,0 +1,214 @@
+# utils/dimensions.py
+"""
+Id-keyed dimension tables with compact integer encoding.
+
+Fact rows carry small int32 codes instead of repeated names/emails; all
+aggregation runs on those codes (``np.bincount``) and the descriptive columns
+are joined back only for the final top-N output.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import ensure_columns, load_csv_safe
+from utils.schema import DEFAULT_MAPPING
+
+logger = logging.getLogger(__name__)
+
+CODE_DTYPE = np.int32
+UNKNOWN_CODE = -1
+
+
+class Dimension:
+    """
+    Lookup table mapping a natural key (integer id or label) to a dense code.
+
+    ``keys[code]`` is the natural key and ``attributes.iloc[code]`` its
+    descriptive columns. Keys are unique and sorted, so codes are stable for a
+    given set of keys.
+    """
+
+    def __init__(self, name: str, keys, attributes: Optional[pd.DataFrame] = None):
+        self.name = name
+        self.keys = pd.Index(keys)
+        if not self.keys.is_unique:
+            raise ValueError(f"Dimension {name!r} has duplicated keys")
+        if attributes is None:
+            attributes = pd.DataFrame(index=range(len(self.keys)))
+        self.attributes = attributes.reset_index(drop=True)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, key: str, attributes: Sequence[str] = (), name: Optional[str] = None) -> "Dimension":
+        """Build a dimension from ``df``, keeping the first row seen for each key."""
+        missing = ensure_columns(df, [key, *attributes])
+        if missing:
+            raise KeyError(f"Columns not found: {missing}")
+        tabla = df[[key, *attributes]].dropna(subset=[key]).drop_duplicates(subset=[key], keep="first")
+        tabla = tabla.sort_values(key, kind="stable")
+        return cls(name or key, tabla[key].to_numpy(), tabla[list(attributes)])
+
+    @classmethod
+    def from_values(cls, values: Iterable, name: str) -> "Dimension":
+        """Build a label dimension (cities, categories, payment methods) from raw values."""
+        etiquetas = pd.unique(pd.Series(values).dropna())
+        etiquetas = np.sort(etiquetas.astype(object))
+        return cls(name, etiquetas, pd.DataFrame({name: etiquetas}))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __repr__(self) -> str:
+        return f"Dimension({self.name!r}, size={len(self)})"
+
+    def encode(self, values) -> np.ndarray:
+        """Return int32 codes for ``values``; unknown keys map to ``UNKNOWN_CODE``."""
+        return self.keys.get_indexer(pd.Index(values)).astype(CODE_DTYPE, copy=False)
+
+    def decode(self, codes, column: Optional[str] = None) -> np.ndarray:
+        """Return the natural keys (or ``column`` attribute values) for ``codes``."""
+        codes = np.asarray(codes)
+        if column is None:
+            return self.keys.to_numpy()[codes]
+        return self.attributes[column].to_numpy()[codes]
+
+    def lookup(self, column: str, other: "Dimension") -> np.ndarray:
+        """
+        Map every code of this dimension to a code of ``other`` via ``column``.
+
+        E.g. ``clientes.lookup("ciudad", ciudades)`` gives the city code for each
+        client code, so fact rows only need to carry the client code.
+        """
+        return other.encode(self.attributes[column])
+
+    def aggregate(self, codes, **measures) -> pd.DataFrame:
+        """Sum each measure per code (all codes of the dimension, in code order)."""
+        codes = np.asarray(codes)
+        return pd.DataFrame({k: sum_by_code(codes, v, len(self)) for k, v in measures.items()})
+
+    def top_n(self, codes, label: str, n: int = 10, by: str = "importe", **measures) -> List[dict]:
+        """
+        Aggregate ``measures`` per code and return the ``n`` largest as records.
+
+        Only the winning codes are decoded back to their ``label`` attribute.
+        """
+        totales = self.aggregate(codes, **measures)
+        orden = np.argsort(-totales[by].to_numpy(), kind="stable")[:n]
+        top = totales.iloc[orden].reset_index(drop=True)
+        top.insert(0, label, self.decode(orden, label))
+        return top.to_dict("records")
+
+
+def sum_by_code(codes, values, size: int) -> np.ndarray:
+    """
+    Sum ``values`` grouped by ``codes`` into an array of length ``size``.
+
+    Rows with ``UNKNOWN_CODE`` or a missing (NaN) value are ignored, like
+    ``groupby().sum()``. Integer inputs (e.g. int64 cents) are accumulated in
+    int64, so the sums stay exact beyond 2**53.
+    """
+    codes = np.asarray(codes)
+    values = np.asarray(values)
+    validos = codes >= 0
+    if np.issubdtype(values.dtype, np.floating):
+        validos &= ~np.isnan(values)
+    if not validos.all():
+        codes, values = codes[validos], values[validos]
+    if np.issubdtype(values.dtype, np.integer):
+        totales = np.zeros(size, dtype=np.int64)
+        np.add.at(totales, codes, values)
+        return totales
+    return np.bincount(codes, weights=values, minlength=size)
+
+
+def build_dimensions(productos: pd.DataFrame, clientes: pd.DataFrame) -> Dict[str, Dimension]:
+    """Build the producto, cliente, ciudad and categoria dimensions from the master CSVs."""
+    producto = Dimension.from_frame(productos, "id_producto", ["nombre_producto", "categoria", "precio_unitario"], name="producto")
+    cliente = Dimension.from_frame(clientes, "id_cliente", ["nombre_cliente", "email", "ciudad"], name="cliente")
+    return {
+        "producto": producto,
+        "cliente": cliente,
+        "ciudad": Dimension.from_values(clientes["ciudad"], "ciudad"),
+        "categoria": Dimension.from_values(productos["categoria"], "categoria"),
+    }
+
+
+def encode_facts(
+    ventas: pd.DataFrame,
+    detalle: pd.DataFrame,
+    dims: Dict[str, Dimension],
+    date_format: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Join ``detalle_ventas`` with ``ventas`` into a compact fact table.
+
+    The result carries only ids, int32 codes and measures; names, emails and
+    category labels stay in ``dims``. A ``medio_pago`` dimension is added to
+    ``dims`` if not present. Dates use ``date_format`` or the format detected
+    by ``utils.schema.DEFAULT_MAPPING`` (``MM-DD-YY`` for ``data/ventas.csv``).
+    """
+    missing = ensure_columns(ventas, ["id_venta", "fecha", "id_cliente", "medio_pago"])
+    missing += ensure_columns(detalle, ["id_venta", "id_producto", "cantidad", "importe"])
+    if missing:
+        raise KeyError(f"Columns not found: {missing}")
+
+    if "medio_pago" not in dims:
+        dims["medio_pago"] = Dimension.from_values(ventas["medio_pago"], "medio_pago")
+
+    formato = date_format or DEFAULT_MAPPING.detect_date_format(ventas["fecha"])
+    if formato is None:
+        logger.warning("encode_facts: no known date format in ventas, using pandas inference")
+    fechas = pd.to_datetime(ventas["fecha"], format=formato, errors="coerce")
+    sin_fecha = int((fechas.isna() & ventas["fecha"].notna()).sum())
+    if sin_fecha:
+        logger.warning("encode_facts: %d of %d dates could not be parsed (format %s)", sin_fecha, len(fechas), formato)
+
+    cabecera = pd.DataFrame({
+        "id_venta": ventas["id_venta"].to_numpy(),
+        "fecha": fechas.to_numpy(),
+        "cliente": dims["cliente"].encode(ventas["id_cliente"]),
+        "medio_pago": dims["medio_pago"].encode(ventas["medio_pago"]),
+    })
+    lineas = pd.DataFrame({
+        "id_venta": detalle["id_venta"].to_numpy(),
+        "producto": dims["producto"].encode(detalle["id_producto"]),
+        "cantidad": detalle["cantidad"].to_numpy(),
+        "importe": detalle["importe"].to_numpy(),
+    })
+    hechos = lineas.merge(cabecera, on="id_venta", how="left", sort=False)
+    hechos["cliente"] = hechos["cliente"].fillna(UNKNOWN_CODE).astype(CODE_DTYPE)
+    hechos["medio_pago"] = hechos["medio_pago"].fillna(UNKNOWN_CODE).astype(CODE_DTYPE)
+
+    # Derived codes come from per-dimension lookup arrays, not per-row string joins.
+    ciudad_por_cliente = dims["cliente"].lookup("ciudad", dims["ciudad"])
+    categoria_por_producto = dims["producto"].lookup("categoria", dims["categoria"])
+    hechos["ciudad"] = _propagate(hechos["cliente"].to_numpy(), ciudad_por_cliente)
+    hechos["categoria"] = _propagate(hechos["producto"].to_numpy(), categoria_por_producto)
+
+    sin_cliente = int((hechos["cliente"] == UNKNOWN_CODE).sum())
+    sin_producto = int((hechos["producto"] == UNKNOWN_CODE).sum())
+    if sin_cliente or sin_producto:
+        logger.warning("encode_facts: %d rows with unknown cliente, %d with unknown producto", sin_cliente, sin_producto)
+    return hechos
+
+
+def _propagate(codes: np.ndarray, mapping: np.ndarray) -> np.ndarray:
+    """Apply ``mapping[code]`` keeping ``UNKNOWN_CODE`` rows unknown."""
+    out = np.full(codes.shape, UNKNOWN_CODE, dtype=CODE_DTYPE)
+    validos = codes >= 0
+    out[validos] = mapping[codes[validos]]
+    return out
+
+
+def load_star_schema(data_dir: str = "data") -> Tuple[Dict[str, Dimension], pd.DataFrame]:
+    """Load the normalized CSVs under ``data_dir`` and return ``(dims, facts)``."""
+    productos = load_csv_safe(os.path.join(data_dir, "productos.csv"))
+    clientes = load_csv_safe(os.path.join(data_dir, "clientes.csv"))
+    ventas = load_csv_safe(os.path.join(data_dir, "ventas.csv"))
+    detalle = load_csv_safe(os.path.join(data_dir, "detalle_ventas.csv"))
+    dims = build_dimensions(productos, clientes)
+    return dims, encode_facts(ventas, detalle, dims)
@@ -0,0 +1,224 @@
+# utils/enrichment.py
+"""
+Product enrichment: assign ``categoria_redefinida`` from product names.
+
+Rules are ordered (category, patterns) pairs compiled into one regex per
+category and evaluated column-wise over the whole catalogue, so the cost is
+one vectorized pass per category rather than one Python call per product.
+Results are cached by ``id_producto`` together with a fingerprint of the
+normalized name; on later runs only new or renamed products are classified.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import ensure_columns, load_csv_safe, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY = "OTROS"
+
+# Evaluated top to bottom; the first matching category wins, so more specific
+# rules ("verduras congeladas", "licor de cafe") go before generic ones.
+# Patterns are regex fragments matched as whole words against lowercase,
+# accent-stripped names.
+DEFAULT_RULES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("BEBIDAS ALCOHÓLICAS", ("cervezas?", "vinos?", "sidra", "fernet", "vodka", "ron", "gin", "whisky",
+                             "licor(?:es)?", "champagne", "espumante", "aperitivo")),
+    ("CONGELADOS", (r"congelad[oa]s?", "helados?")),
+    ("PANIFICADOS", ("pan", "pan lactal", "medialunas?", "facturas?", "bizcochos?", "tostadas?", "budin")),
+    ("SNACKS", ("galletitas?", "papas fritas", "chocolates?", "barritas?", "chicles?", "alfajor(?:es)?",
+                "caramelos?", "chupetin(?:es)?", "turron(?:es)?", "mani", "frutos secos", "snacks?")),
+    ("LÁCTEOS", ("leche", "yogur(?:t|es)?", "quesos?", "manteca", "crema de leche")),
+    ("BEBIDAS", ("agua", "agua mineral", "jugos?", "gaseosas?", "coca cola", "pepsi", "sprite", "fanta",
+                 "energetic[oa]s?", "soda", "tonica")),
+    ("CUIDADO PERSONAL", ("shampoo", "acondicionador", "desodorantes?", "crema dental", "cepillo de dientes",
+                          "hilo dental", "mascarilla", "jabon de tocador", "toallas humedas", "afeitar",
+                          "protector solar")),
+    ("LIMPIEZA", ("detergentes?", "lavandina", r"limpia\w*", "desengrasantes?", "trapo de piso", "esponjas?",
+                  "suavizantes?", "jabon en polvo", "insecticida")),
+    ("HOGAR", ("papel higienico", "servilletas?", "rollo de cocina", "bolsas?", "velas?", "fosforos",
+               "pilas?", "papel aluminio")),
+    ("GRANOS Y CEREALES", ("arroz", "fideos", "lentejas", "garbanzos", "porotos", "harinas?", "avena",
+                           "granola", "cereal(?:es)?", "polenta", "trigo")),
+    ("ALIMENTOS", ("yerba", "cafe", "te", "mate", "stevia", "edulcorante", "sopas?", "caldos?", "mermeladas?",
+                   "miel", "vinagre", "salsas?", "aceites?", "azucar", "sal")),
+    ("FRUTAS Y VERDURAS", ("frutas?", "verduras?", "aceitunas?", "tomates?", "manzanas?", "naranjas?",
+                           "bananas?", "cebollas?")),
+)
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """Lowercase, strip accents and collapse whitespace, column-wise."""
+    return (
+        names.fillna("")
+        .astype(str)
+        .str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+        .str.lower()
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def name_fingerprints(normalized: pd.Series) -> np.ndarray:
+    """Return a uint64 hash per normalized name (vectorized, no per-row hashlib)."""
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+class CategoryClassifier:
+    """Keyword/regex rule engine that labels product names in batch."""
+
+    def __init__(self, rules: Sequence[Tuple[str, Sequence[str]]] = DEFAULT_RULES, default: str = DEFAULT_CATEGORY):
+        self.rules = [(categoria, tuple(patrones)) for categoria, patrones in rules]
+        self.default = default
+        self._compiled = [
+            (categoria, re.compile(r"\b(?:" + "|".join(patrones) + r")\b"))
+            for categoria, patrones in self.rules
+        ]
+
+    @property
+    def version(self) -> str:
+        """Digest of the rule set; a cache built with other rules is discarded."""
+        payload = json.dumps([self.rules, self.default], ensure_ascii=False).encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()
+
+    def classify(self, names: pd.Series, normalized: bool = False) -> np.ndarray:
+        """Return the category for each name (first matching rule wins)."""
+        texto = names if normalized else normalize_names(names)
+        condiciones = [texto.str.contains(patron).to_numpy(dtype=bool) for _, patron in self._compiled]
+        categorias = [categoria for categoria, _ in self._compiled]
+        return np.select(condiciones, categorias, default=self.default).astype(object)
+
+
+class EnrichmentCache:
+    """``id_producto -> (fingerprint, categoria)`` cache persisted as JSON."""
+
+    def __init__(self, version: str, entries: Optional[pd.DataFrame] = None):
+        self.version = version
+        if entries is None:
+            entries = pd.DataFrame({
+                "id_producto": pd.Series(dtype="int64"),
+                "fingerprint": pd.Series(dtype="uint64"),
+                "categoria_redefinida": pd.Series(dtype=object),
+            })
+        self.entries = entries
+
+    @classmethod
+    def load(cls, path: Optional[str], version: str) -> "EnrichmentCache":
+        if not path or not os.path.exists(path):
+            return cls(version)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != version:
+            logger.info("EnrichmentCache: rules changed, discarding cache %s", path)
+            return cls(version)
+        productos = data.get("productos", {})
+        entries = pd.DataFrame({
+            "id_producto": np.fromiter((int(k) for k in productos), dtype=np.int64, count=len(productos)),
+            "fingerprint": np.fromiter((int(v[0]) for v in productos.values()), dtype=np.uint64, count=len(productos)),
+            "categoria_redefinida": [v[1] for v in productos.values()],
+        })
+        return cls(version, entries)
+
+    def save(self, path: str) -> None:
+        productos = {
+            str(i): [str(fp), cat]
+            for i, fp, cat in zip(
+                self.entries["id_producto"].tolist(),
+                self.entries["fingerprint"].tolist(),
+                self.entries["categoria_redefinida"].tolist(),
+            )
+        }
+        write_json_atomic({"version": self.version, "productos": productos}, path)
+
+    def update(self, ids, fingerprints, categorias) -> None:
+        nuevos = pd.DataFrame({
+            "id_producto": np.asarray(ids, dtype=np.int64),
+            "fingerprint": np.asarray(fingerprints, dtype=np.uint64),
+            "categoria_redefinida": np.asarray(categorias, dtype=object),
+        })
+        combinado = pd.concat([self.entries, nuevos], ignore_index=True)
+        self.entries = combinado.drop_duplicates(subset=["id_producto"], keep="last").reset_index(drop=True)
+
+
+def enrich_products(
+    productos: pd.DataFrame,
+    cache_path: Optional[str] = None,
+    classifier: Optional[CategoryClassifier] = None,
+    batch_size: int = 100_000,
+) -> pd.DataFrame:
+    """
+    Return ``productos`` with a ``categoria_redefinida`` column.
+
+    Only products whose id is not cached, or whose normalized name changed
+    since it was cached, are classified; they are processed in batches of
+    ``batch_size`` rows. The cache is written back when ``cache_path`` is set.
+    """
+    missing = ensure_columns(productos, ["id_producto", "nombre_producto"])
+    if missing:
+        raise KeyError(f"Columns not found: {missing}")
+    classifier = classifier or CategoryClassifier()
+    cache = EnrichmentCache.load(cache_path, classifier.version)
+
+    normalizados = normalize_names(productos["nombre_producto"])
+    huellas = name_fingerprints(normalizados)
+    ids = productos["id_producto"].to_numpy(dtype=np.int64)
+
+    indice = pd.Index(cache.entries["id_producto"])
+    posiciones = indice.get_indexer(ids)
+    encontrados = posiciones >= 0
+    vigentes = np.zeros(len(ids), dtype=bool)
+    vigentes[encontrados] = cache.entries["fingerprint"].to_numpy()[posiciones[encontrados]] == huellas[encontrados]
+
+    categorias = np.empty(len(ids), dtype=object)
+    categorias[vigentes] = cache.entries["categoria_redefinida"].to_numpy()[posiciones[vigentes]]
+
+    pendientes = np.flatnonzero(~vigentes)
+    for inicio in range(0, len(pendientes), batch_size):
+        lote = pendientes[inicio:inicio + batch_size]
+        categorias[lote] = classifier.classify(normalizados.iloc[lote], normalized=True)
+    logger.info("enrich_products: %d products, %d classified, %d from cache",
+                len(ids), len(pendientes), int(vigentes.sum()))
+
+    if len(pendientes):
+        cache.update(ids[pendientes], huellas[pendientes], categorias[pendientes])
+        if cache_path:
+            cache.save(cache_path)
+
+    resultado = productos.copy()
+    resultado["categoria_redefinida"] = categorias
+    return resultado
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Enriquece el catálogo con categoria_redefinida")
+    parser.add_argument("productos", nargs="?", default="data/productos.csv", help="CSV de productos")
+    parser.add_argument("--salida", default="productos_enriquecido.csv", help="CSV de salida")
+    parser.add_argument("--cache", default=".cache/enriquecimiento.json", help="Cache por id_producto")
+    args = parser.parse_args(argv)
+
+    productos = load_csv_safe(args.productos)
+    if args.cache:
+        os.makedirs(os.path.dirname(args.cache) or ".", exist_ok=True)
+    enriquecido = enrich_products(productos, cache_path=args.cache)
+    enriquecido.to_csv(args.salida, index=False)
+    resumen: Dict[str, int] = enriquecido["categoria_redefinida"].value_counts().to_dict()
+    logger.info("✅ Catálogo enriquecido en '%s': %s", args.salida, resumen)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    sys.exit(main())
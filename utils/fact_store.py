@@ -0,0 +1,376 @@
+# utils/fact_store.py
+"""
+Memory-mapped binary fact store for the sales pipeline.
+
+A store is a directory ``<name>.facts`` holding:
+
+  hechos.<generation>.bin  fixed-width NumPy structured array, one record per sale line
+  meta.json                generation, row count, dtype and the side dictionaries
+                           for string columns
+
+Dates are int32 days since 1970-01-01 and every string column is an int32
+code into a ``Dimension`` rebuilt from ``meta.json``. A missing ``fecha``,
+``cantidad`` or ``id_venta`` is stored as the reserved ``MISSING`` value of its
+field type, and every reader skips it like pandas skips NaN/NaT. Opening the
+store maps the data file read-only with ``np.memmap``; several worker processes
+opening the same store share one copy in the OS page cache, and
+``FactStore.aggregate`` streams over the mapped pages without materializing a
+DataFrame.
+
+Rewrites are atomic for readers: the data file of a new generation is written
+under its own name, then ``meta.json`` (which names it) is replaced, so a
+reader always pairs a data file with the dictionaries and row count it was
+written with.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import uuid
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import DataLoadError, ensure_columns, load_csv_safe, write_json_atomic
+from utils.dimensions import UNKNOWN_CODE, Dimension, sum_by_code
+
+logger = logging.getLogger(__name__)
+
+FACT_STORE_SUFFIX = ".facts"
+# Version 3 marks missing fecha/cantidad/id_venta with MISSING; older stores
+# are still read (they were written by versions that did not check for them).
+FACT_STORE_VERSION = 3
+SUPPORTED_VERSIONS = (1, 2, FACT_STORE_VERSION)
+# Version 1 stores have no generation and always use this data file name.
+LEGACY_DATA_FILE = "hechos.bin"
+META_FILE = "meta.json"
+
+FACT_DTYPE = np.dtype([
+    ("id_venta", "<i8"),
+    ("fecha", "<i4"),
+    ("cliente", "<i4"),
+    ("producto", "<i4"),
+    ("ciudad", "<i4"),
+    ("categoria_redefinida", "<i4"),
+    ("medio_pago", "<i4"),
+    ("cantidad", "<i4"),
+    ("importe", "<f8"),
+])
+
+# Store field -> (natural key column of the flat schema, attribute columns).
+DIMENSIONS = {
+    "cliente": ("id_cliente", ["nombre_cliente_final"]),
+    "producto": ("id_producto", ["nombre_producto"]),
+    "ciudad": ("ciudad", []),
+    "categoria_redefinida": ("categoria_redefinida", []),
+    "medio_pago": ("medio_pago", []),
+}
+
+# Reserved value for a missing integer field, per field type.
+MISSING = {np.dtype("<i4"): np.iinfo(np.int32).min, np.dtype("<i8"): np.iinfo(np.int64).min}
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def is_fact_store(path: str) -> bool:
+    """True if ``path`` is a fact store directory."""
+    return path.endswith(FACT_STORE_SUFFIX) and os.path.isfile(os.path.join(path, META_FILE))
+
+
+def _build_dimension(df: pd.DataFrame, campo: str) -> Dimension:
+    clave, atributos = DIMENSIONS[campo]
+    if atributos:
+        return Dimension.from_frame(df, clave, atributos, name=campo)
+    return Dimension.from_values(df[clave], campo)
+
+
+def _dimension_to_json(dim: Dimension) -> dict:
+    return {
+        "keys": dim.keys.tolist(),
+        "attributes": {c: dim.attributes[c].tolist() for c in dim.attributes.columns},
+    }
+
+
+def _dimension_from_json(campo: str, data: dict) -> Dimension:
+    return Dimension(campo, data["keys"], pd.DataFrame(data["attributes"]))
+
+
+def write_fact_store(df: pd.DataFrame, path: str) -> str:
+    """
+    Write the flat sales frame ``df`` (schema of ``AnalisisVentas``) as a fact store.
+
+    ``id_venta`` is optional; when missing the row number is used. Returns the
+    store path. The data file of the new generation is complete before
+    ``meta.json`` switches to it; older data files are removed afterwards.
+    """
+    if not path.endswith(FACT_STORE_SUFFIX):
+        path += FACT_STORE_SUFFIX
+    requeridas = ["fecha", "cantidad", "importe"] + [clave for clave, _ in DIMENSIONS.values()]
+    missing = ensure_columns(df, requeridas)
+    if missing:
+        raise KeyError(f"Columns not found: {missing}")
+
+    os.makedirs(path, exist_ok=True)
+    dims = {campo: _build_dimension(df, campo) for campo in DIMENSIONS}
+    n = len(df)
+    generacion = uuid.uuid4().hex
+    datos = f"hechos.{generacion}.bin"
+
+    fd, tmp_path = tempfile.mkstemp(prefix="tmp_facts_", dir=path)
+    os.close(fd)
+    try:
+        hechos = np.memmap(tmp_path, dtype=FACT_DTYPE, mode="w+", shape=(n,)) if n else np.zeros(0, FACT_DTYPE)
+        hechos["id_venta"] = _integer_field(df["id_venta"], "id_venta") if "id_venta" in df.columns else np.arange(n)
+        fechas = pd.to_datetime(df["fecha"]).to_numpy().astype("datetime64[D]")
+        hechos["fecha"] = np.where(np.isnat(fechas), MISSING[FACT_DTYPE["fecha"]],
+                                   (fechas - _EPOCH).astype(np.int64))
+        for campo, (clave, _) in DIMENSIONS.items():
+            hechos[campo] = dims[campo].encode(df[clave])
+        hechos["cantidad"] = _integer_field(df["cantidad"], "cantidad")
+        hechos["importe"] = df["importe"].to_numpy(dtype=np.float64)
+        if isinstance(hechos, np.memmap):
+            hechos.flush()
+        del hechos
+        os.replace(tmp_path, os.path.join(path, datos))
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except Exception:
+            pass
+        logger.exception("write_fact_store: failed to write %s", path)
+        raise
+
+    meta = {
+        "version": FACT_STORE_VERSION,
+        "generacion": generacion,
+        "datos": datos,
+        "rows": n,
+        "dtype": [[nombre, FACT_DTYPE[nombre].str] for nombre in FACT_DTYPE.names],
+        "dimensiones": {campo: _dimension_to_json(dim) for campo, dim in dims.items()},
+    }
+    write_json_atomic(meta, os.path.join(path, META_FILE))
+    _remove_stale_data_files(path, datos)
+    logger.debug("write_fact_store: wrote %d rows to %s (generation %s)", n, path, generacion)
+    return path
+
+
+def _integer_field(valores: pd.Series, campo: str) -> np.ndarray:
+    """Integer values of ``campo`` with missing ones as ``MISSING``; fractional values are rejected."""
+    numeros = pd.to_numeric(valores)
+    faltan = numeros.isna().to_numpy()
+    enteros = numeros.to_numpy(dtype=np.float64, na_value=0.0)
+    if (enteros != np.floor(enteros)).any():
+        raise ValueError(f"Column {campo!r} has non-integer values")
+    centinela = MISSING[FACT_DTYPE[campo]]
+    if (enteros[~faltan] == centinela).any():
+        raise ValueError(f"Column {campo!r} uses the reserved missing value {centinela}")
+    if faltan.any():
+        logger.warning("write_fact_store: %d missing %s values stored as missing", int(faltan.sum()), campo)
+    return np.where(faltan, centinela, enteros.astype(np.int64))
+
+
+def _remove_stale_data_files(path: str, actual: str) -> None:
+    """Delete data files of previous generations; open mappings stay valid on POSIX."""
+    for nombre in os.listdir(path):
+        if nombre != actual and nombre.startswith("hechos.") and nombre.endswith(".bin"):
+            try:
+                os.unlink(os.path.join(path, nombre))
+            except OSError:
+                pass
+
+
+class FactStore:
+    """Read-only view over a fact store; ``hechos`` is an ``np.memmap``."""
+
+    def __init__(self, path: str, hechos: np.ndarray, dims: Dict[str, Dimension]):
+        self.path = path
+        self.hechos = hechos
+        self.dims = dims
+
+    @classmethod
+    def open(cls, path: str, intentos: int = 3) -> "FactStore":
+        """
+        Map the data file named by ``meta.json``.
+
+        If a writer replaced the store between reading ``meta.json`` and opening
+        its data file, the metadata is read again (up to ``intentos`` times).
+        """
+        if not is_fact_store(path):
+            raise FileNotFoundError(path)
+        for intento in range(intentos):
+            with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") not in SUPPORTED_VERSIONS:
+                raise DataLoadError(f"Unsupported fact store version in {path}: {meta.get('version')}")
+            dtype = np.dtype([tuple(campo) for campo in meta["dtype"]])
+            if dtype != FACT_DTYPE:
+                raise DataLoadError(f"Fact store {path} has an unexpected layout")
+            rows = int(meta["rows"])
+            datos = os.path.join(path, meta.get("datos", LEGACY_DATA_FILE))
+            try:
+                hechos = np.memmap(datos, dtype=dtype, mode="r", shape=(rows,)) if rows else np.zeros(0, dtype=dtype)
+                break
+            except FileNotFoundError:
+                if intento == intentos - 1:
+                    raise
+                logger.debug("FactStore.open: %s replaced while opening, retrying", datos)
+        dims = {campo: _dimension_from_json(campo, data) for campo, data in meta["dimensiones"].items()}
+        return cls(path, hechos, dims)
+
+    def __len__(self) -> int:
+        return len(self.hechos)
+
+    def fechas(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Return ``datetime64[D]`` dates for a row range (NaT where missing)."""
+        fecha = self.hechos["fecha"][start:stop]
+        fechas = _EPOCH + fecha.astype("timedelta64[D]")
+        fechas[fecha == MISSING[FACT_DTYPE["fecha"]]] = np.datetime64("NaT")
+        return fechas
+
+    def days(self) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Calendar from the first to the last sale day and each row's offset into
+        it; rows without a date get offset -1.
+        """
+        fecha = self.hechos["fecha"]
+        validas = fecha != MISSING[FACT_DTYPE["fecha"]]
+        if not validas.any():
+            return pd.DatetimeIndex([]), np.full(len(fecha), -1, dtype=np.int64)
+        primero, ultimo = int(fecha[validas].min()), int(fecha[validas].max())
+        dias = pd.date_range(_EPOCH + primero, _EPOCH + ultimo, freq="D")
+        return dias, np.where(validas, fecha.astype(np.int64) - primero, -1)
+
+    def measure(self, nombre: str) -> np.ndarray:
+        """
+        Column ``nombre`` ready to be summed: the mapped column itself, or a
+        float64 copy with NaN for missing values if it has any.
+        """
+        valores = self.hechos[nombre]
+        centinela = MISSING.get(FACT_DTYPE[nombre])
+        if centinela is None:
+            return valores
+        faltan = valores == centinela
+        if not faltan.any():
+            return valores
+        return np.where(faltan, np.nan, valores)
+
+    def daily(self, importe: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        ``importe`` and ``cantidad`` totals per day with sales, summed on the
+        mapped columns. ``importe`` overrides the stored amounts (e.g. in cents).
+        """
+        dias, dia = self.days()
+        importe = self.hechos["importe"] if importe is None else importe
+        tabla = pd.DataFrame({
+            "fecha": dias,
+            "importe": sum_by_code(dia, importe, len(dias)),
+            "cantidad": sum_by_code(dia, self.measure("cantidad"), len(dias)),
+        })
+        return tabla.loc[np.bincount(dia[dia >= 0], minlength=len(dias)) > 0].reset_index(drop=True)
+
+    def distinct(self, campo: str) -> int:
+        """Number of members of dimension ``campo`` present in the facts."""
+        codigos = self.hechos[campo]
+        return int(np.count_nonzero(np.bincount(codigos[codigos >= 0], minlength=len(self.dims[campo]))))
+
+    def iter_chunks(self, chunk_rows: int = 1 << 20) -> Iterable[np.ndarray]:
+        """Yield consecutive record slices; each slice is a view of the mapped file."""
+        for inicio in range(0, len(self.hechos), chunk_rows):
+            yield self.hechos[inicio:inicio + chunk_rows]
+
+    def aggregate(self, campo: str, measures=("importe", "cantidad"), chunk_rows: int = 1 << 20) -> pd.DataFrame:
+        """
+        Sum ``measures`` per code of dimension ``campo``, streaming over the mapping.
+
+        Returns one row per dimension member with its label and the totals.
+        """
+        dim = self.dims[campo]
+        totales = {m: np.zeros(len(dim), dtype=np.int64 if FACT_DTYPE[m].kind == "i" else np.float64)
+                   for m in measures}
+        for bloque in self.iter_chunks(chunk_rows):
+            for m in measures:
+                codigos = bloque[campo]
+                centinela = MISSING.get(FACT_DTYPE[m])
+                if centinela is not None:
+                    # Missing values are left out of the sum, like NaN in groupby().sum()
+                    codigos = np.where(bloque[m] == centinela, UNKNOWN_CODE, codigos)
+                totales[m] += sum_by_code(codigos, bloque[m], len(dim))
+        clave, atributos = DIMENSIONS[campo]
+        etiqueta = atributos[0] if atributos else clave
+        resultado = pd.DataFrame(totales)
+        resultado.insert(0, etiqueta, dim.decode(np.arange(len(dim)), etiqueta))
+        return resultado
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Materialize the flat ``AnalisisVentas`` schema.
+
+        String columns are categoricals built on the stored codes, so names are
+        held once per distinct value rather than once per row.
+        """
+        columnas = {"id_venta": _nullable_integer(self.hechos["id_venta"]), "fecha": self.fechas()}
+        for campo, (clave, atributos) in DIMENSIONS.items():
+            codigos = np.asarray(self.hechos[campo])
+            dim = self.dims[campo]
+            if atributos:
+                columnas[clave] = _decode_nullable(dim.decode(np.maximum(codigos, 0)), codigos)
+                for atributo in atributos:
+                    columnas[atributo] = _categorical_attribute(dim, atributo, codigos)
+            else:
+                columnas[clave] = pd.Categorical.from_codes(codigos, categories=dim.keys)
+        # Missing quantities come back as NaN, as pandas reads them from the CSV
+        columnas["cantidad"] = self.measure("cantidad")
+        columnas["importe"] = self.hechos["importe"]
+        return pd.DataFrame(columnas)
+
+
+def _nullable_integer(valores: np.ndarray) -> pd.Series:
+    faltan = valores == MISSING[valores.dtype]
+    if not faltan.any():
+        return pd.Series(valores)
+    return pd.Series(pd.arrays.IntegerArray(np.where(faltan, 0, valores).astype(np.int64), faltan))
+
+
+def _decode_nullable(valores: np.ndarray, codigos: np.ndarray) -> pd.Series:
+    serie = pd.Series(valores)
+    if (codigos == UNKNOWN_CODE).any():
+        serie = serie.astype("Int64")
+        serie[codigos == UNKNOWN_CODE] = pd.NA
+    return serie
+
+
+def _categorical_attribute(dim: Dimension, atributo: str, codigos: np.ndarray) -> pd.Categorical:
+    """Categorical of ``atributo`` per row, reusing the stored dimension codes."""
+    valores = dim.attributes[atributo]
+    categorias = pd.Index(pd.unique(valores.dropna()))
+    por_codigo = categorias.get_indexer(valores)
+    salida = np.full(codigos.shape, -1, dtype=np.int64)
+    validos = codigos >= 0
+    salida[validos] = por_codigo[codigos[validos]]
+    return pd.Categorical.from_codes(salida, categories=categorias)
+
+
+def open_fact_store(path: str) -> FactStore:
+    """Open ``path`` read-only; see ``FactStore``."""
+    return FactStore.open(path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convierte un CSV de ventas en un almacén binario mapeable")
+    parser.add_argument("csv", help="CSV con el esquema de AnalisisVentas")
+    parser.add_argument("destino", help=f"Directorio de salida (se añade '{FACT_STORE_SUFFIX}' si falta)")
+    args = parser.parse_args(argv)
+
+    ruta = write_fact_store(load_csv_safe(args.csv), args.destino)
+    logger.info("✅ Almacén de hechos escrito en '%s'", ruta)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# utils/money.py
+"""
+Exact money handling with int64 cents.
+
+Amounts are parsed into integer cents at load time (from the CSV text when
+available, so no float rounding is ever introduced), summed with integer
+arithmetic and converted back to currency units only when exporting.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import ensure_columns, load_csv_safe
+
+logger = logging.getLogger(__name__)
+
+CENTS = 100
+MONEY_COLUMNS = ("importe", "precio_unitario")
+
+# Optional sign, integer part (with optional thousands separators) and up to any
+# number of decimals after '.'; the third decimal rounds half away from zero.
+_MONEY_RE = r"^\s*(?P<signo>[-+]?)\s*\$?\s*(?P<entero>\d{1,3}(?:,\d{3})+|\d*)(?:\.(?P<fraccion>\d*))?\s*$"
+
+
+def to_cents(values, errors: str = "raise") -> np.ndarray:
+    """
+    Convert amounts to int64 cents.
+
+    Integer inputs are scaled, floats are rounded to the nearest cent and
+    strings are parsed digit by digit (exact); halves round away from zero in
+    both cases. With ``errors="raise"`` any unparseable or missing value raises
+    ``ValueError``; with ``errors="coerce"`` they become 0 and are logged.
+    """
+    centavos, invalidos = parse_cents(values)
+    return _check_invalid(centavos, invalidos, errors)
+
+
+def parse_cents(values) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Like ``to_cents`` but never raises: return ``(cents, invalid)`` with 0 cents
+    where ``invalid`` (missing or unparseable) is True.
+    """
+    serie = values if isinstance(values, pd.Series) else pd.Series(np.asarray(values))
+    if pd.api.types.is_bool_dtype(serie):
+        raise TypeError("boolean values are not money")
+    if pd.api.types.is_integer_dtype(serie) and not serie.isna().any():
+        return serie.to_numpy(dtype=np.int64) * CENTS, np.zeros(len(serie), dtype=bool)
+    if pd.api.types.is_numeric_dtype(serie):
+        flotantes = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+        invalidos = ~np.isfinite(flotantes)
+        flotantes = np.where(invalidos, 0.0, flotantes)
+        # Same rule as the text path: half a cent rounds away from zero. Rounding
+        # to 6 decimals first drops the binary error (1.005 * 100 == 100.4999...)
+        escalados = np.round(np.abs(flotantes) * CENTS, 6)
+        centavos = np.sign(flotantes) * np.floor(escalados + 0.5)
+        return centavos.astype(np.int64), invalidos
+
+    partes = serie.astype("string").str.extract(_MONEY_RE)
+    sin_digitos = partes["entero"].fillna("").eq("") & partes["fraccion"].fillna("").eq("")
+    invalidos = (partes["entero"].isna() | sin_digitos).to_numpy(dtype=bool)
+    entero = partes["entero"].fillna("").str.replace(",", "", regex=False).replace("", "0")
+    fraccion = partes["fraccion"].fillna("").str.ljust(3, "0")
+    centavos = (
+        pd.to_numeric(entero, errors="coerce").fillna(0).to_numpy(dtype=np.int64) * CENTS
+        + pd.to_numeric(fraccion.str[:2], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+        + (pd.to_numeric(fraccion.str[2], errors="coerce").fillna(0).to_numpy(dtype=np.int64) >= 5)
+    )
+    centavos = np.where(partes["signo"].fillna("").eq("-").to_numpy(dtype=bool), -centavos, centavos)
+    return np.where(invalidos, 0, centavos).astype(np.int64), invalidos
+
+
+def _check_invalid(centavos: np.ndarray, invalidos: np.ndarray, errors: str) -> np.ndarray:
+    if invalidos.any():
+        if errors == "raise":
+            raise ValueError(f"{int(invalidos.sum())} values could not be parsed as money")
+        logger.warning("to_cents: %d unparseable values set to 0", int(invalidos.sum()))
+        centavos = np.where(invalidos, 0, centavos)
+    return centavos
+
+
+def from_cents(centavos):
+    """Convert cents (scalar, array or Series) back to currency units as float."""
+    if isinstance(centavos, (pd.Series, pd.DataFrame)):
+        return centavos / CENTS
+    if np.ndim(centavos) == 0:
+        return int(centavos) / CENTS
+    return np.asarray(centavos, dtype=np.int64) / CENTS
+
+
+def read_money_columns_as_text(columns=MONEY_COLUMNS) -> dict:
+    """``dtype`` mapping for ``pd.read_csv`` that keeps money columns as text for exact parsing."""
+    return {c: "string" for c in columns}
+
+
+def check_importe_consistency(
+    detalle: pd.DataFrame,
+    en_centavos: bool = False,
+    incompletas: Optional[np.ndarray] = None,
+) -> pd.DataFrame:
+    """
+    Return the rows where ``cantidad * precio_unitario != importe``, compared in cents.
+
+    The check is vectorized over the whole frame; the result adds the expected
+    amount and the difference (both in currency units). Pass ``en_centavos=True``
+    when the money columns already hold int64 cents, with ``incompletas``
+    marking rows whose amounts were missing before the conversion. Rows with a
+    missing ``cantidad``, ``precio_unitario`` or ``importe`` are not compared;
+    their count is in ``resultado.attrs["incompletas"]``.
+    """
+    missing = ensure_columns(detalle, ["cantidad", "precio_unitario", "importe"])
+    if missing:
+        raise KeyError(f"Columns not found: {missing}")
+    cantidad = pd.to_numeric(detalle["cantidad"], errors="coerce")
+    faltan = cantidad.isna().to_numpy()
+    if en_centavos:
+        precio = detalle["precio_unitario"].to_numpy(dtype=np.int64)
+        importe = detalle["importe"].to_numpy(dtype=np.int64)
+        if incompletas is not None:
+            faltan = faltan | np.asarray(incompletas, dtype=bool)
+    else:
+        precio, precio_invalido = parse_cents(detalle["precio_unitario"])
+        importe, importe_invalido = parse_cents(detalle["importe"])
+        faltan = faltan | precio_invalido | importe_invalido
+    esperado = cantidad.fillna(0).to_numpy(dtype=np.int64) * precio
+    distintos = (esperado != importe) & ~faltan
+    resultado = detalle.loc[distintos].copy()
+    resultado["importe_esperado"] = from_cents(esperado[distintos])
+    resultado["diferencia"] = from_cents(importe[distintos] - esperado[distintos])
+    resultado.attrs["incompletas"] = int(faltan.sum())
+    return resultado
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verifica cantidad * precio_unitario == importe")
+    parser.add_argument("csv", nargs="?", default="data/detalle_ventas.csv", help="CSV de detalle de ventas")
+    args = parser.parse_args(argv)
+
+    detalle = load_csv_safe(args.csv, dtype=read_money_columns_as_text())
+    inconsistentes = check_importe_consistency(detalle)
+    if inconsistentes.attrs["incompletas"]:
+        logger.warning("⚠️  %d filas sin cantidad, precio_unitario o importe no se verificaron",
+                       inconsistentes.attrs["incompletas"])
+    if inconsistentes.empty:
+        logger.info("✅ %d filas consistentes en '%s'", len(detalle), args.csv)
+        return 0
+    logger.error("❌ %d de %d filas con importe inconsistente:\n%s",
+                 len(inconsistentes), len(detalle), inconsistentes.head(20).to_string())
+    return 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    sys.exit(main())
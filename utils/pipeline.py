@@ -0,0 +1,152 @@
+# utils/pipeline.py
+"""
+Small concurrency helpers for the analysis pipeline.
+
+- ``prefetch`` runs a producer (e.g. a CSV chunk reader) in a background thread
+  feeding a bounded queue, so the next chunk can be read while the current one
+  is being processed (``read_csv_chunks(..., read_ahead=True)``).
+- ``run_concurrently`` runs independent output stages (PNG, JSON, text) at the
+  same time, keeping one of them on the calling thread when a library (such as
+  matplotlib's pyplot) must stay there.
+
+Threads only overlap work that releases the GIL (file I/O, NumPy kernels).
+The pandas C parser holds it while building the columns of a chunk, so
+reading ahead did not pay off in ``benchmarks/bench_pipeline.py`` and is
+opt-in; chunked reading itself bounds memory rather than saving wall-clock
+time.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_FIN = object()
+
+
+class _ProducerError:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def prefetch(iterable: Iterable, maxsize: int = 2) -> Iterator:
+    """
+    Iterate ``iterable`` in a background thread, buffering at most ``maxsize`` items.
+
+    Exceptions raised by the producer are re-raised in the consumer. If the
+    consumer stops early the producer is released, and the consumer waits for
+    it to finish the item in progress before returning. The producer closes
+    ``iterable``'s iterator (e.g. a generator owning a file) on its own thread.
+    """
+    if maxsize < 1:
+        raise ValueError("maxsize must be >= 1")
+    cola: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    detener = threading.Event()
+
+    def _poner(item) -> bool:
+        while not detener.is_set():
+            try:
+                cola.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _productor():
+        iterador = iter(iterable)
+        try:
+            for item in iterador:
+                if not _poner(item):
+                    return
+        except BaseException as exc:  # propagated to the consumer
+            _poner(_ProducerError(exc))
+            return
+        finally:
+            cerrar = getattr(iterador, "close", None)
+            if cerrar is not None:
+                cerrar()
+        _poner(_FIN)
+
+    hilo = threading.Thread(target=_productor, name="prefetch", daemon=True)
+    hilo.start()
+    try:
+        while True:
+            item = cola.get()
+            if item is _FIN:
+                break
+            if isinstance(item, _ProducerError):
+                raise item.exc
+            yield item
+    finally:
+        detener.set()
+        # No timeout: whatever the producer owns must not be released under it
+        hilo.join()
+
+
+def read_csv_chunks(
+    path: str,
+    chunksize: int = 100_000,
+    read_ahead: bool = False,
+    maxsize: int = 2,
+    **read_csv_kwargs,
+) -> Iterator:
+    """
+    Yield DataFrame chunks of ``path``.
+
+    With ``read_ahead`` the next chunks are read in a background thread (see
+    ``prefetch``); it is off by default because it was slower and used more
+    memory than plain chunked reading in ``benchmarks/bench_pipeline.py``.
+    """
+    bloques = _read_chunks(path, chunksize, read_csv_kwargs)
+    if read_ahead:
+        # The reader is opened, read and closed entirely on the producer thread
+        yield from prefetch(bloques, maxsize=maxsize)
+    else:
+        yield from bloques
+
+
+def _read_chunks(path: str, chunksize: int, read_csv_kwargs: dict) -> Iterator:
+    import pandas as pd
+
+    with pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs) as lector:
+        yield from lector
+
+
+def run_concurrently(
+    tareas: Dict[str, Callable[[], Any]],
+    en_hilo_actual: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Run independent zero-argument tasks concurrently and return their results by name.
+
+    The task named ``en_hilo_actual`` runs on the calling thread while the rest
+    run in a thread pool. All tasks are waited for; the first failure (in
+    ``tareas`` order) is re-raised afterwards.
+    """
+    resultados: Dict[str, Any] = {}
+    errores: Dict[str, BaseException] = {}
+    en_pool = {nombre: f for nombre, f in tareas.items() if nombre != en_hilo_actual}
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(en_pool)), thread_name_prefix="salida") as pool:
+        futuros = {nombre: pool.submit(f) for nombre, f in en_pool.items()}
+        if en_hilo_actual is not None:
+            try:
+                resultados[en_hilo_actual] = tareas[en_hilo_actual]()
+            except Exception as exc:
+                errores[en_hilo_actual] = exc
+        for nombre, futuro in futuros.items():
+            try:
+                resultados[nombre] = futuro.result()
+            except Exception as exc:
+                errores[nombre] = exc
+
+    for nombre in tareas:
+        if nombre in errores:
+            logger.error("run_concurrently: task %s failed: %s", nombre, errores[nombre])
+            raise errores[nombre]
+    return resultados
@@ -0,0 +1,186 @@
+# utils/publish.py
+"""
+Delta-aware, content-addressed publishing of dashboard outputs.
+
+Each artifact is hashed (SHA-256) before writing:
+
+- unchanged artifacts are not rewritten at all;
+- changed artifacts are written under a hashed name (``datos_dashboard.<hash>.json``)
+  that browsers and proxies can cache forever, and under their stable name for
+  existing consumers;
+- ``manifest.json`` maps each logical name to its current hashed file, so
+  ``index.html`` fetches only the manifest with revalidation;
+- for JSON artifacts an RFC 6902 JSON Patch against the previous version can be
+  written, so clients that hold the previous export download only the delta.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, List, Optional
+
+from utils.data_utils import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_LENGTH = 12
+
+
+def content_hash(contenido: bytes) -> str:
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def hashed_name(nombre: str, digest: str) -> str:
+    """``datos_dashboard.json`` -> ``datos_dashboard.<digest[:12]>.json``"""
+    base, ext = os.path.splitext(nombre)
+    return f"{base}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def json_patch(anterior: Any, nuevo: Any, ruta: str = "") -> List[dict]:
+    """
+    Return RFC 6902 operations turning ``anterior`` into ``nuevo``.
+
+    Objects are diffed key by key and equal-length arrays element by element;
+    arrays that changed length are replaced whole.
+    """
+    if anterior == nuevo:
+        return []
+    if isinstance(anterior, dict) and isinstance(nuevo, dict):
+        ops = []
+        for clave in anterior:
+            if clave not in nuevo:
+                ops.append({"op": "remove", "path": f"{ruta}/{_escape(clave)}"})
+        for clave, valor in nuevo.items():
+            sub = f"{ruta}/{_escape(clave)}"
+            if clave not in anterior:
+                ops.append({"op": "add", "path": sub, "value": valor})
+            else:
+                ops.extend(json_patch(anterior[clave], valor, sub))
+        return ops
+    if isinstance(anterior, list) and isinstance(nuevo, list) and len(anterior) == len(nuevo):
+        ops = []
+        for i, (a, b) in enumerate(zip(anterior, nuevo)):
+            ops.extend(json_patch(a, b, f"{ruta}/{i}"))
+        return ops
+    return [{"op": "replace", "path": ruta, "value": nuevo}]
+
+
+def _escape(clave) -> str:
+    return str(clave).replace("~", "~0").replace("/", "~1")
+
+
+def _write_bytes_atomic(contenido: bytes, dest_path: str) -> None:
+    dest_dir = os.path.dirname(dest_path) or "."
+    os.makedirs(dest_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix="tmp_pub_", dir=dest_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(contenido)
+        os.replace(tmp_path, dest_path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except Exception:
+            pass
+        raise
+
+
+class Publicador:
+    """
+    Publishes artifacts into ``directorio`` and keeps ``manifest.json`` current.
+
+    Thread-safe: the output stages may publish concurrently.
+    """
+
+    def __init__(self, directorio: str = ".", deltas: bool = True, conservar: int = 2):
+        self.directorio = directorio
+        self.deltas = deltas
+        self.conservar = max(1, conservar)
+        self._lock = threading.Lock()
+        self.manifest = self._cargar_manifest()
+
+    @property
+    def ruta_manifest(self) -> str:
+        return os.path.join(self.directorio, MANIFEST_NAME)
+
+    def _cargar_manifest(self) -> dict:
+        try:
+            with open(self.ruta_manifest, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+            logger.warning("Publicador: ignoring manifest with unknown version in %s", self.ruta_manifest)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            logger.warning("Publicador: unreadable manifest %s: %s", self.ruta_manifest, exc)
+        return {"version": MANIFEST_VERSION, "artefactos": {}}
+
+    def publicar(self, nombre: str, contenido: bytes, huella: Optional[bytes] = None) -> bool:
+        """
+        Publish ``contenido`` as logical artifact ``nombre``.
+
+        ``huella`` (default: ``contenido``) is what gets hashed, so volatile
+        parts such as a generation timestamp can be left out of the comparison.
+        Returns True if anything was written.
+        """
+        digest = content_hash(contenido if huella is None else huella)
+        with self._lock:
+            entrada = self.manifest["artefactos"].get(nombre)
+            estable = os.path.join(self.directorio, nombre)
+            if entrada and entrada["sha256"] == digest and os.path.exists(estable) \
+                    and os.path.exists(os.path.join(self.directorio, entrada["archivo"])):
+                logger.info("Publicador: %s sin cambios, no se reescribe", nombre)
+                return False
+
+            archivo = hashed_name(nombre, digest)
+            _write_bytes_atomic(contenido, os.path.join(self.directorio, archivo))
+            _write_bytes_atomic(contenido, estable)
+
+            nueva = {"archivo": archivo, "sha256": digest, "bytes": len(contenido)}
+            historial = [archivo] + [a for a in (entrada or {}).get("historial", []) if a != archivo]
+            if entrada and self.deltas and nombre.endswith(".json"):
+                delta = self._escribir_delta(nombre, entrada, archivo, contenido)
+                if delta:
+                    nueva["delta"] = {"desde": entrada["archivo"], "archivo": delta}
+            for viejo in historial[self.conservar:]:
+                self._eliminar(viejo)
+            nueva["historial"] = historial[:self.conservar]
+            self.manifest["artefactos"][nombre] = nueva
+            write_json_atomic(self.manifest, self.ruta_manifest)
+            logger.info("Publicador: %s -> %s", nombre, archivo)
+            return True
+
+    def publicar_json(self, nombre: str, obj: Any, **dump_kwargs) -> bool:
+        dump_kwargs.setdefault("ensure_ascii", False)
+        dump_kwargs.setdefault("indent", 2)
+        return self.publicar(nombre, json.dumps(obj, **dump_kwargs).encode("utf-8"))
+
+    def _escribir_delta(self, nombre: str, anterior: dict, archivo: str, contenido: bytes) -> Optional[str]:
+        ruta_anterior = os.path.join(self.directorio, anterior["archivo"])
+        try:
+            with open(ruta_anterior, "r", encoding="utf-8") as f:
+                previo = json.load(f)
+            nuevo = json.loads(contenido.decode("utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Publicador: no delta for %s: %s", nombre, exc)
+            return None
+        base, _ = os.path.splitext(archivo)
+        delta = f"{base}.desde-{anterior['sha256'][:HASH_LENGTH]}.patch.json"
+        write_json_atomic(json_patch(previo, nuevo), os.path.join(self.directorio, delta))
+        return delta
+
+    def _eliminar(self, archivo: str) -> None:
+        base, _ = os.path.splitext(archivo)
+        candidatos = [archivo] + [f for f in os.listdir(self.directorio) if f.startswith(base + ".desde-")]
+        for f in candidatos:
+            try:
+                os.unlink(os.path.join(self.directorio, f))
+            except FileNotFoundError:
+                pass
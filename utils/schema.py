@@ -0,0 +1,320 @@
+# utils/schema.py
+"""
+Schema reconciliation and multi-source merge of sales CSV exports.
+
+Branches export CSVs with different column names and date formats. A
+``SchemaMapping`` resolves each file's header against known aliases, reads only
+the mapped columns (typed while parsing) and returns the canonical schema used
+by ``AnalisisVentas`` plus a ``fuente`` column. ``merge_sources`` concatenates
+any number of sources and drops duplicates with a single 64-bit row hash per
+key, so the cost is linear in the number of rows, with no pairwise comparison
+between files.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import os
+import sys
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import ensure_columns, load_csv_safe
+
+logger = logging.getLogger(__name__)
+
+# Canonical column -> pandas dtype after normalization.
+CANONICAL_SCHEMA: Dict[str, str] = {
+    "id_venta": "Int64",
+    "fecha": "datetime64[ns]",
+    "id_cliente": "Int64",
+    "nombre_cliente_final": "string",
+    "ciudad": "string",
+    "id_producto": "Int64",
+    "nombre_producto": "string",
+    "categoria": "string",
+    "categoria_redefinida": "string",
+    "cantidad": "Int64",
+    "importe": "float64",
+    "medio_pago": "string",
+}
+
+DEFAULT_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "id_venta": ("venta_id", "id_transaccion", "transaccion", "nro_venta", "sale_id"),
+    "fecha": ("fecha_venta", "date", "dia"),
+    "id_cliente": ("cliente_id", "customer_id"),
+    "nombre_cliente_final": ("nombre_cliente", "cliente", "customer", "customer_name"),
+    "ciudad": ("localidad", "city"),
+    "id_producto": ("producto_id", "product_id", "sku"),
+    "nombre_producto": ("producto", "product", "descripcion"),
+    # The raw category of the source is kept apart from the re-labelled one
+    # (``utils.enrichment`` assigns ``categoria_redefinida`` from product names).
+    "categoria": ("category", "rubro"),
+    "cantidad": ("unidades", "qty", "quantity"),
+    "importe": ("monto", "total", "amount", "importe_total"),
+    "medio_pago": ("metodo_pago", "forma_pago", "payment_method"),
+}
+
+# Tried in order on a sample of each source; the first format that parses the
+# whole sample wins. MM-DD-YY (data/ventas.csv) precedes DD-MM-YY on purpose.
+DEFAULT_DATE_FORMATS: Tuple[str, ...] = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%m-%d-%y", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y")
+
+# A sale can carry the same product on several lines, so ``linea`` (the
+# occurrence number of the product within the sale in its source) completes the key.
+DEFAULT_KEY: Tuple[str, ...] = ("fuente", "id_venta", "id_producto", "linea")
+
+_STRING_COLUMNS = [c for c, t in CANONICAL_SCHEMA.items() if t == "string"]
+_INTEGER_COLUMNS = [c for c, t in CANONICAL_SCHEMA.items() if t == "Int64"]
+
+
+def _normalize_header(nombre: str) -> str:
+    return nombre.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+class SchemaMapping:
+    """Maps source headers onto ``CANONICAL_SCHEMA`` and parses dates per source."""
+
+    def __init__(
+        self,
+        aliases: Optional[Mapping[str, Iterable[str]]] = None,
+        date_formats: Sequence[str] = DEFAULT_DATE_FORMATS,
+        required: Sequence[str] = ("fecha", "importe"),
+    ):
+        aliases = DEFAULT_ALIASES if aliases is None else aliases
+        self.date_formats = tuple(date_formats)
+        self.required = list(required)
+        self._lookup: Dict[str, str] = {}
+        for canonica in CANONICAL_SCHEMA:
+            for nombre in (canonica, *aliases.get(canonica, ())):
+                self._lookup.setdefault(_normalize_header(nombre), canonica)
+
+    def resolve(self, header: Sequence[str]) -> Dict[str, str]:
+        """Return ``{source column: canonical column}``; the first match per canonical column wins."""
+        mapeo: Dict[str, str] = {}
+        usadas = set()
+        for columna in header:
+            canonica = self._lookup.get(_normalize_header(columna))
+            if canonica and canonica not in usadas:
+                mapeo[columna] = canonica
+                usadas.add(canonica)
+        return mapeo
+
+    def detect_date_format(self, valores: pd.Series, muestra: int = 200) -> Optional[str]:
+        """Return the first format that parses every non-empty value of a sample."""
+        ejemplo = valores.dropna().head(muestra).astype(str).str.strip()
+        ejemplo = ejemplo[ejemplo != ""]
+        if ejemplo.empty:
+            return None
+        for formato in self.date_formats:
+            if pd.to_datetime(ejemplo, format=formato, errors="coerce").notna().all():
+                return formato
+        return None
+
+
+DEFAULT_MAPPING = SchemaMapping()
+
+
+def strip_strings(serie: pd.Series) -> pd.Series:
+    """Strip whitespace once per distinct value (names, cities, ... repeat a lot)."""
+    codigos, unicos = pd.factorize(serie)
+    limpios = np.append(pd.Series(unicos, dtype="string").str.strip().to_numpy(dtype=object), pd.NA)
+    return pd.Series(pd.array(limpios[codigos], dtype="string"), index=serie.index)
+
+
+def read_header(path: str, encoding: str = "utf-8") -> List[str]:
+    """Read only the header row of a CSV."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    with open(path, "r", encoding=encoding, newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def source_name(path: str) -> str:
+    """Default source of a file: its name without directory or extension."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def parse_sources(
+    fuentes: Union[Sequence[str], Mapping[str, Union[str, Sequence[str]]]],
+    fuente: Optional[str] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Return ``(fuente, path)`` pairs in input order.
+
+    ``fuentes`` is a mapping ``{fuente: path or [paths]}`` or a list whose items
+    are either ``"fuente=path"`` or a plain path. Plain paths belong to
+    ``fuente`` when given, else to their file name (``source_name``). Files of
+    the same source are deduplicated against each other, so a re-export must
+    share its source name with the original.
+    """
+    if isinstance(fuentes, Mapping):
+        return [(nombre, ruta) for nombre, rutas in fuentes.items()
+                for ruta in ([rutas] if isinstance(rutas, str) else rutas)]
+    pares = []
+    for argumento in fuentes:
+        nombre, separador, ruta = argumento.partition("=")
+        # An existing file whose name contains '=' is still a plain path
+        if not separador or not nombre or os.path.exists(argumento):
+            nombre, ruta = fuente or source_name(argumento), argumento
+        pares.append((nombre, ruta))
+    return pares
+
+
+def normalize_source(
+    path: str,
+    fuente: Optional[str] = None,
+    mapping: SchemaMapping = DEFAULT_MAPPING,
+    date_format: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Load ``path`` into the canonical typed schema.
+
+    Only mapped columns are read; strings are parsed as ``string`` while
+    reading, numbers are coerced (invalid or, for integer columns, fractional
+    -> NA) and dates use ``date_format`` or the format detected for this
+    source. Canonical columns the source lacks are added as NA, and ``linea``
+    numbers repeated lines (see ``line_numbers``). ``df.attrs`` records the
+    source columns and the mapping.
+    """
+    fuente = fuente or source_name(path)
+    header = read_header(path)
+    mapeo = mapping.resolve(header)
+    dtype = {origen: "string" for origen, canonica in mapeo.items() if canonica in _STRING_COLUMNS or canonica == "fecha"}
+    # With no recognised column, the first one is still read so every row is kept
+    usecols = list(mapeo) or header[:1]
+    crudo = load_csv_safe(path, usecols=usecols, dtype=dtype).rename(columns=mapeo)
+
+    missing = ensure_columns(crudo, mapping.required)
+    if missing:
+        logger.warning("normalize_source: %s lacks required columns %s", path, missing)
+
+    n = len(crudo)
+    salida = pd.DataFrame(index=pd.RangeIndex(n))
+    for columna, tipo in CANONICAL_SCHEMA.items():
+        if columna not in crudo.columns:
+            salida[columna] = pd.Series(index=salida.index, dtype=tipo)
+        elif columna == "fecha":
+            formato = date_format or mapping.detect_date_format(crudo[columna])
+            if formato is None:
+                logger.warning("normalize_source: no known date format for %s, using pandas inference", path)
+            salida[columna] = pd.to_datetime(crudo[columna], format=formato, errors="coerce").astype(tipo)
+        elif columna in _STRING_COLUMNS:
+            salida[columna] = strip_strings(crudo[columna])
+        elif columna in _INTEGER_COLUMNS:
+            salida[columna] = _to_integer(crudo[columna], columna, path)
+        else:
+            salida[columna] = pd.to_numeric(crudo[columna], errors="coerce").astype(tipo)
+    salida.insert(0, "fuente", pd.Series(fuente, index=salida.index, dtype="string"))
+    salida["linea"] = line_numbers(salida)
+    salida.attrs["columnas_origen"] = header
+    salida.attrs["mapeo"] = mapeo
+    return salida
+
+
+def _to_integer(serie: pd.Series, columna: str, path: str) -> pd.Series:
+    """Coerce to ``Int64``; fractional values (``cantidad=1.5``) become NA instead of failing the cast."""
+    numeros = pd.to_numeric(serie, errors="coerce")
+    if pd.api.types.is_float_dtype(numeros):
+        fraccionarios = numeros.notna() & (numeros != np.floor(numeros))
+        if fraccionarios.any():
+            logger.warning("normalize_source: %d non-integer values in %s of %s set to NA",
+                           int(fraccionarios.sum()), columna, path)
+            numeros = numeros.mask(fraccionarios)
+    return numeros.astype("Int64")
+
+
+def line_numbers(df: pd.DataFrame) -> pd.Series:
+    """
+    Occurrence number of each row among rows of the same sale and product.
+
+    Rows without ``id_venta`` are numbered among identical rows instead, so a
+    re-export lines up with the original and genuine repeats stay distinct.
+    """
+    linea = df.groupby(["id_venta", "id_producto"], dropna=False, sort=False).cumcount()
+    sin_id = df["id_venta"].isna()
+    if sin_id.any():
+        linea[sin_id] = df.loc[sin_id].groupby(list(CANONICAL_SCHEMA), dropna=False, sort=False).cumcount()
+    return linea.astype("Int64")
+
+
+def row_keys(df: pd.DataFrame, clave: Sequence[str] = DEFAULT_KEY) -> np.ndarray:
+    """
+    One uint64 hash per row over the ``clave`` columns present in ``df``.
+
+    Rows without ``id_venta`` have no business key; they are hashed over all
+    canonical columns (and ``linea``) instead.
+    """
+    columnas = [c for c in clave if c in df.columns]
+    claves = pd.util.hash_pandas_object(df[columnas], index=False).to_numpy().copy()
+    if "id_venta" in columnas and df["id_venta"].isna().any():
+        sin_id = df["id_venta"].isna().to_numpy()
+        completas = ["fuente", *CANONICAL_SCHEMA, "linea"]
+        claves[sin_id] = pd.util.hash_pandas_object(df.loc[sin_id, completas], index=False).to_numpy()
+    return claves
+
+
+def merge_sources(
+    fuentes: Union[Sequence[str], Mapping[str, Union[str, Sequence[str]]]],
+    mapping: SchemaMapping = DEFAULT_MAPPING,
+    clave: Sequence[str] = DEFAULT_KEY,
+    fuente: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Normalize and merge many sources into one deduplicated fact set.
+
+    ``fuentes`` is anything ``parse_sources`` accepts: paths, ``"fuente=path"``
+    items or a mapping ``{fuente: path or [paths]}`` for branches exported as
+    several files; ``fuente`` names the plain paths. Duplicates on ``clave``
+    keep the last occurrence, so later files override earlier ones.
+    ``df.attrs["duplicados"]`` holds the dropped count.
+    """
+    pares = parse_sources(fuentes, fuente=fuente)
+    return deduplicate([normalize_source(ruta, fuente=nombre, mapping=mapping) for nombre, ruta in pares], clave)
+
+
+def deduplicate(partes: Sequence[pd.DataFrame], clave: Sequence[str] = DEFAULT_KEY) -> pd.DataFrame:
+    """Concatenate normalized frames and keep the last row per ``clave`` hash."""
+    if not partes:
+        return empty_facts()
+    todo = pd.concat(partes, ignore_index=True)
+    duplicados = pd.Index(row_keys(todo, clave)).duplicated(keep="last")
+    resultado = todo.loc[~duplicados].reset_index(drop=True)
+    resultado.attrs = {"duplicados": int(duplicados.sum())}
+    logger.info("deduplicate: %d sources, %d rows, %d duplicates dropped",
+                len(partes), len(todo), resultado.attrs["duplicados"])
+    return resultado
+
+
+def empty_facts() -> pd.DataFrame:
+    """An empty frame with the canonical columns and dtypes."""
+    columnas = {"fuente": pd.Series(dtype="string")}
+    columnas.update({c: pd.Series(dtype=t) for c, t in CANONICAL_SCHEMA.items()})
+    columnas["linea"] = pd.Series(dtype="Int64")
+    resultado = pd.DataFrame(columnas)
+    resultado.attrs["duplicados"] = 0
+    return resultado
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Unifica exportaciones CSV heterogéneas en un único CSV deduplicado")
+    parser.add_argument("csv", nargs="+",
+                        help="CSVs de origen: 'ruta' o 'fuente=ruta'. Los duplicados se buscan entre "
+                             "archivos de la misma fuente (por defecto, el nombre de archivo)")
+    parser.add_argument("--fuente", default=None,
+                        help="Fuente de los CSV dados sin 'fuente=' (p. ej. reexportaciones de una sucursal)")
+    parser.add_argument("-o", "--salida", default="ventas_unificadas.csv", help="CSV de salida")
+    args = parser.parse_args(argv)
+
+    unificado = merge_sources(args.csv, fuente=args.fuente)
+    unificado.to_csv(args.salida, index=False, date_format="%Y-%m-%d")
+    logger.info("✅ %d filas (%d duplicados descartados) -> '%s'",
+                len(unificado), unificado.attrs["duplicados"], args.salida)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    sys.exit(main())